@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from moviepy import AudioFileClip, CompositeAudioClip
 
 from geovideo.schemas import AudioConfig
 
+CACHE_VERSION = 2
+AUDIO_BITRATE = "192k"
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+_key_locks: Dict[str, threading.Lock] = {}
+_guard = threading.Lock()
+
 
 @dataclass
 class AudioTracks:
@@ -42,3 +54,53 @@ def mix_audio(tracks: AudioTracks, config: AudioConfig) -> Optional[CompositeAud
         music = tracks.music.volumex(config.ducking_ratio)
         return CompositeAudioClip([music, tracks.voiceover])
     return CompositeAudioClip(clips)
+
+
+def file_digest(path: str | Path) -> str:
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    with _guard:
+        digest = _digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _guard:
+            _digests[key] = digest
+    return digest
+
+
+def audio_cache_key(config: AudioConfig, duration: float) -> Optional[str]:
+    if not config.music_path and not config.voiceover_path:
+        return None
+    payload = {
+        "version": CACHE_VERSION,
+        "config": config.model_dump(mode="json", exclude={"music_path", "voiceover_path", "cache_dir"}),
+        "music": file_digest(config.music_path) if config.music_path else None,
+        "voiceover": file_digest(config.voiceover_path) if config.voiceover_path else None,
+        "duration": round(duration, 6),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cached_mixed_audio(config: AudioConfig, duration: float) -> Optional[Path]:
+    key = audio_cache_key(config, duration)
+    if key is None:
+        return None
+    path = Path(config.cache_dir) / f"{key}.m4a"
+    with _guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        if path.exists():
+            return path
+        audio = mix_audio(load_audio(config, duration), config)
+        if audio is None:
+            return None
+        audio = audio.set_duration(duration)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{key}.{os.getpid()}.tmp.m4a")
+        audio.write_audiofile(str(tmp_path), fps=44100, codec="aac", bitrate=AUDIO_BITRATE, logger=None)
+        os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from geovideo.geo import TILE_SIZE, latlon_to_world_px, tile_range_for_view
+from geovideo.profiling import stage
+from geovideo.providers.base import TileProvider
+
+MAX_MOSAIC_PIXELS = 48_000_000
+
+
+@dataclass(frozen=True)
+class Mosaic:
+    zoom: int
+    origin_x: int
+    origin_y: int
+    image: Image.Image
+    _levels: Dict[int, np.ndarray] = field(default_factory=dict, compare=False, repr=False)
+
+    def crop(self, center_x: float, center_y: float, width: int, height: int) -> Image.Image:
+        left = math.floor(center_x - width / 2) - self.origin_x
+        top = math.floor(center_y - height / 2) - self.origin_y
+        return self.image.crop((left, top, left + width, top + height))
+
+    def level(self, index: int) -> np.ndarray:
+        array = self._levels.get(index)
+        if array is None:
+            if index == 0:
+                array = np.asarray(self.image)
+            else:
+                finer = self.level(index - 1)
+                size = (max(finer.shape[1] // 2, 1), max(finer.shape[0] // 2, 1))
+                array = cv2.resize(finer, size, interpolation=cv2.INTER_AREA)
+            self._levels[index] = array
+        return array
+
+
+def build_mosaic(
+    provider: TileProvider,
+    center_lat: float,
+    center_lon: float,
+    zoom: int,
+    width: int,
+    height: int,
+) -> Mosaic:
+    start_x, start_y, end_x, end_y = tile_range_for_view(center_lat, center_lon, zoom, width, height)
+    with stage("basemap.stitch"):
+        pixels = np.empty(((end_y - start_y + 1) * TILE_SIZE, (end_x - start_x + 1) * TILE_SIZE, 3), dtype=np.uint8)
+        for tile_x in range(start_x, end_x + 1):
+            for tile_y in range(start_y, end_y + 1):
+                left = (tile_x - start_x) * TILE_SIZE
+                top = (tile_y - start_y) * TILE_SIZE
+                pixels[top : top + TILE_SIZE, left : left + TILE_SIZE] = provider.get_tile_array(zoom, tile_x, tile_y)
+        image = Image.fromarray(pixels)
+    return Mosaic(zoom=zoom, origin_x=start_x * TILE_SIZE, origin_y=start_y * TILE_SIZE, image=image)
+
+
+def crop_view(mosaic: Mosaic, center_lat: float, center_lon: float, width: int, height: int) -> Image.Image:
+    center_x, center_y = latlon_to_world_px(center_lat, center_lon, mosaic.zoom)
+    return mosaic.crop(center_x, center_y, width, height)
+
+
+def deep_mosaic_extent(min_zoom: float, max_zoom: float, width: int, height: int) -> Tuple[int, int, int]:
+    zoom = math.ceil(max_zoom)
+    while True:
+        scale = 2 ** (zoom - min_zoom)
+        cover_w, cover_h = math.ceil(width * scale) + 2, math.ceil(height * scale) + 2
+        if cover_w * cover_h <= MAX_MOSAIC_PIXELS or zoom <= 0:
+            return zoom, cover_w, cover_h
+        zoom -= 1
+
+
+def overzoom_extent(zoom: float, width: int, height: int) -> Tuple[int, int, int]:
+    tile_zoom = math.floor(zoom + 1e-9)
+    if zoom - tile_zoom < 1e-9:
+        return tile_zoom, width, height
+    scale = 2 ** (tile_zoom - zoom)
+    return tile_zoom, math.ceil(width * scale) + 2, math.ceil(height * scale) + 2
+
+
+def warp_view(
+    mosaic: Mosaic,
+    center_lat: float,
+    center_lon: float,
+    zoom: float,
+    width: int,
+    height: int,
+) -> Image.Image:
+    source_per_px = 2 ** (mosaic.zoom - zoom)
+    index = max(int(math.floor(math.log2(source_per_px))), 0) if source_per_px > 1 else 0
+    level = mosaic.level(index)
+    step = source_per_px / 2**index
+    center_x, center_y = latlon_to_world_px(center_lat, center_lon, mosaic.zoom)
+    offset_x = (center_x - mosaic.origin_x) / 2**index
+    offset_y = (center_y - mosaic.origin_y) / 2**index
+    matrix = np.float32(
+        [
+            [step, 0, (0.5 - width / 2) * step + offset_x - 0.5],
+            [0, step, (0.5 - height / 2) * step + offset_y - 0.5],
+        ]
+    )
+    with stage("basemap.warp"):
+        array = cv2.warpAffine(
+            level,
+            matrix,
+            (width, height),
+            flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+    return Image.fromarray(array)
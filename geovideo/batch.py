@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from geovideo.providers import build_provider
+from geovideo.providers.base import TileProvider
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.render import Log, load_config, render_video
+from geovideo.schemas import InputConfig, ProviderConfig
+
+
+@dataclass
+class BatchResult:
+    input: str
+    output: Optional[str]
+    status: str
+    seconds: float
+    frames_rendered: int = 0
+    frames_held: int = 0
+    tiles_fetched: int = 0
+    error: Optional[str] = None
+
+
+class SharedProviders:
+    def __init__(self, memory_cache: Optional[TileMemoryCache]) -> None:
+        self.memory_cache = memory_cache
+        self._providers: Dict[str, TileProvider] = {}
+        self._lock = threading.Lock()
+
+    def get(self, config: ProviderConfig) -> TileProvider:
+        key = config.model_dump_json(exclude={"memory_cache_bytes"})
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = build_provider(config, self.memory_cache)
+                self._providers[key] = provider
+            return provider
+
+
+def discover_inputs(path: Path) -> List[Path]:
+    if path.is_dir():
+        return sorted(candidate for candidate in path.glob("*.json") if candidate.is_file())
+    return [path]
+
+
+def job_config(path: Path, out_dir: Optional[Path] = None) -> InputConfig:
+    config = load_config(path)
+    output = config.output
+    suffix = Path(output.path).suffix or ".mp4"
+    if out_dir is not None:
+        output.path = str(out_dir / f"{path.stem}{suffix}")
+        for rendition in output.renditions:
+            rendition.path = str(out_dir / f"{path.stem}.{Path(rendition.path).name}")
+    elif "path" not in output.model_fields_set:
+        output.path = str(path.with_suffix(suffix))
+    return config
+
+
+def check_outputs(configs: Dict[Path, InputConfig]) -> None:
+    owners: Dict[Path, Path] = {}
+    for path, config in configs.items():
+        for target in [config.output.path, *(rendition.path for rendition in config.output.renditions)]:
+            owner = owners.setdefault(Path(target).resolve(), path)
+            if owner != path:
+                raise ValueError(f"{owner} and {path} both write {target}; set distinct output paths or use --out-dir")
+
+
+def run_batch(
+    inputs: List[Path],
+    jobs: int,
+    *,
+    out_dir: Optional[Path] = None,
+    fit: str = "all",
+    encoder: str = "moviepy",
+    workers: int = 1,
+    memory_cache_bytes: int = 512 * 1024 * 1024,
+    log: Optional[Log] = None,
+    on_result: Optional[Callable[[BatchResult], None]] = None,
+) -> List[BatchResult]:
+    configs: Dict[Path, InputConfig] = {}
+    errors: Dict[Path, Exception] = {}
+    for path in inputs:
+        try:
+            configs[path] = job_config(path, out_dir)
+        except Exception as exc:  # noqa: BLE001 - reported per job in the manifest
+            errors[path] = exc
+    check_outputs(configs)
+    shared = SharedProviders(TileMemoryCache(memory_cache_bytes) if memory_cache_bytes > 0 else None)
+
+    def run_job(path: Path) -> BatchResult:
+        started = time.perf_counter()
+        output: Optional[str] = None
+        try:
+            if path in errors:
+                raise errors[path]
+            config = configs[path]
+            output = config.output.path
+            stats = render_video(
+                config, fit=fit, workers=workers, encoder=encoder, provider=shared.get(config.provider)
+            )
+            result = BatchResult(
+                input=str(path),
+                output=output,
+                status="ok",
+                seconds=round(time.perf_counter() - started, 3),
+                frames_rendered=stats.frames_rendered,
+                frames_held=stats.frames_held,
+                tiles_fetched=stats.tiles_fetched,
+            )
+        except Exception as exc:  # noqa: BLE001 - reported per job in the manifest
+            result = BatchResult(
+                input=str(path),
+                output=output,
+                status="failed",
+                seconds=round(time.perf_counter() - started, 3),
+                error="".join(traceback.format_exception_only(type(exc), exc)).strip(),
+            )
+        if log:
+            log(f"[{result.status}] {path} ({result.seconds:.1f}s)")
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(executor.map(run_job, inputs))
+
+
+def write_manifest(path: Path, results: List[BatchResult]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    summary = {
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result.status == "ok"),
+        "failed": sum(1 for result in results if result.status != "ok"),
+        "jobs": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
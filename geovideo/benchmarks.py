@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.draw import layout_labels, load_font
+from geovideo.geo import tile_range_for_view
+from geovideo.providers.base import TileProvider
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.providers.store import DirectoryTileStore
+from geovideo.render import render_video
+from geovideo.schemas import InputConfig
+
+FORMAT_VERSION = 1
+CENTER = (21.028511, 105.804817)
+ZOOM = 15
+Log = Callable[[str], None]
+
+
+@dataclass
+class Measurement:
+    name: str
+    unit: str
+    value: float
+    better: str = "lower"
+    samples: List[float] = field(default_factory=list)
+    params: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    change: float
+    regression: bool
+
+
+@dataclass(frozen=True)
+class BenchmarkPlan:
+    resolutions: Tuple[Tuple[int, int], ...] = ((540, 960), (1080, 1920))
+    poi_counts: Tuple[int, ...] = (0, 10, 50)
+    label_counts: Tuple[int, ...] = (10, 100, 500)
+    frames: int = 30
+    repeat: int = 5
+    video_duration: float = 3.0
+    video_size: Tuple[int, int] = (540, 960)
+    video_fps: int = 24
+
+
+QUICK_PLAN = BenchmarkPlan(
+    resolutions=((180, 320),),
+    poi_counts=(0, 5),
+    label_counts=(10, 50),
+    frames=4,
+    repeat=2,
+    video_duration=0.5,
+    video_size=(180, 320),
+    video_fps=8,
+)
+
+
+@contextmanager
+def offline() -> Iterator[None]:
+    previous = os.environ.get("GEOVIDEO_OFFLINE")
+    os.environ["GEOVIDEO_OFFLINE"] = "1"
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("GEOVIDEO_OFFLINE", None)
+        else:
+            os.environ["GEOVIDEO_OFFLINE"] = previous
+
+
+def write_synthetic_tiles(root: Path, zooms: List[int], width: int, height: int) -> int:
+    store = DirectoryTileStore(root)
+    rng = np.random.default_rng(0)
+    written = 0
+    for zoom in zooms:
+        start_x, start_y, end_x, end_y = tile_range_for_view(*CENTER, zoom, width, height)
+        for x in range(start_x, end_x + 1):
+            for y in range(start_y, end_y + 1):
+                base = rng.integers(60, 200, size=3)
+                noise = rng.integers(-25, 25, size=(256, 256, 1))
+                pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+                buffer = io.BytesIO()
+                Image.fromarray(pixels).save(buffer, format="PNG")
+                store.put(zoom, x, y, buffer.getvalue())
+                written += 1
+    return written
+
+
+def synthetic_config(width: int, height: int, pois: int, cache_dir: Path, **timeline) -> InputConfig:
+    rng = random.Random(pois)
+    spread = 0.012
+    return InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": CENTER[0], "lon": CENTER[1]},
+            "pois": [
+                {
+                    "name": f"Place {index}",
+                    "lat": CENTER[0] + rng.uniform(-spread, spread),
+                    "lon": CENTER[1] + rng.uniform(-spread, spread),
+                    "type": rng.choice(["school", "market", "food", "other"]),
+                }
+                for index in range(pois)
+            ],
+            "style": {"width": width, "height": height, "subtitle": "Benchmark"},
+            "timeline": {"camera_start_zoom": ZOOM, "camera_end_zoom": ZOOM, **timeline},
+            "provider": {"cache_dir": str(cache_dir)},
+            "max_pois": max(pois, 1),
+        }
+    )
+
+
+def _provider(cache_dir: Path, memory_cache: Optional[TileMemoryCache] = None) -> TileProvider:
+    return TileProvider(name="osm", url_template="", attribution="", cache_dir=cache_dir, memory_cache=memory_cache)
+
+
+def _timed(fn: Callable[[], object], repeat: int, warmup: int = 0) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _measure(name: str, samples: List[float], **params: object) -> Measurement:
+    return Measurement(name=name, unit="ms", value=statistics.median(samples), samples=samples, params=params)
+
+
+def bench_render_frame(plan: BenchmarkPlan, cache_dir: Path) -> List[Measurement]:
+    results = []
+    camera = CameraState(center_lat=CENTER[0], center_lon=CENTER[1], zoom=ZOOM)
+    for width, height in plan.resolutions:
+        for pois in plan.poi_counts:
+            config = synthetic_config(width, height, pois, cache_dir)
+            params = {"width": width, "height": height, "pois": pois}
+            compositor = Compositor(config, _provider(cache_dir, TileMemoryCache(256 * 1024 * 1024)))
+            times = np.linspace(0, config.timeline.duration, plan.frames, endpoint=False)
+            first = _timed(lambda: compositor.render_frame(FrameContext(time_s=0.0, camera=camera)), 1)
+            steady = [
+                _timed(lambda: compositor.render_frame(FrameContext(time_s=float(t), camera=camera)), 1)[0]
+                for t in times
+            ]
+            results.append(_measure(f"render_frame.first[{width}x{height},pois={pois}]", first, **params))
+            results.append(_measure(f"render_frame.steady[{width}x{height},pois={pois}]", steady, **params))
+    return results
+
+
+def bench_layout_labels(plan: BenchmarkPlan) -> List[Measurement]:
+    font = load_font(None, 24)
+    results = []
+    for count in plan.label_counts:
+        rng = random.Random(count)
+        labels = [(f"Place {index}", (rng.randint(0, 1080), rng.randint(0, 1920))) for index in range(count)]
+        samples = _timed(lambda: layout_labels(labels, font), plan.repeat, warmup=1)
+        results.append(_measure(f"layout_labels[n={count}]", samples, labels=count))
+    return results
+
+
+def bench_get_tile(plan: BenchmarkPlan, cache_dir: Path) -> List[Measurement]:
+    width, height = plan.resolutions[-1]
+    start_x, start_y, end_x, end_y = tile_range_for_view(*CENTER, ZOOM, width, height)
+    keys = [(ZOOM, x, y) for x in range(start_x, end_x + 1) for y in range(start_y, end_y + 1)]
+    samples: Dict[str, List[float]] = {"cold_disk": [], "warm_memory": [], "offline_placeholder": []}
+    for _ in range(plan.repeat):
+        provider = _provider(cache_dir, TileMemoryCache(256 * 1024 * 1024))
+        missing = _provider(cache_dir / "missing")
+        samples["cold_disk"] += _timed(lambda: [provider.get_tile(*key) for key in keys], 1)
+        samples["warm_memory"] += _timed(lambda: [provider.get_tile(*key) for key in keys], 1)
+        samples["offline_placeholder"] += _timed(lambda: [missing.get_tile(*key) for key in keys], 1)
+    return [
+        _measure(f"get_tile.{name}", [sample / len(keys) for sample in values], tiles=len(keys))
+        for name, values in samples.items()
+    ]
+
+
+def bench_render_video(plan: BenchmarkPlan, cache_dir: Path, out_dir: Path, encoder: str) -> List[Measurement]:
+    width, height = plan.video_size
+    config = synthetic_config(width, height, 10, cache_dir, duration=plan.video_duration)
+    config.style.fps = plan.video_fps
+    config.output.path = str(out_dir / "bench.mp4")
+    start = time.perf_counter()
+    stats = render_video(config, seed=0, encoder=encoder, provider=_provider(cache_dir))
+    elapsed = time.perf_counter() - start
+    frames = stats.frames_rendered + stats.frames_held
+    return [
+        Measurement(
+            name=f"render_video.fps[{width}x{height},{encoder}]",
+            unit="fps",
+            value=frames / elapsed,
+            better="higher",
+            samples=[elapsed * 1000],
+            params={"width": width, "height": height, "frames": frames, "encoder": encoder},
+        )
+    ]
+
+
+def run_benchmarks(
+    plan: BenchmarkPlan = BenchmarkPlan(),
+    encoder: str = "ffmpeg-pipe",
+    video: bool = True,
+    log: Optional[Log] = None,
+) -> dict:
+    measurements: List[Measurement] = []
+    with offline(), tempfile.TemporaryDirectory(prefix="geovideo-bench-") as tmp:
+        cache_dir = Path(tmp) / "tiles"
+        largest = max(plan.resolutions + (plan.video_size,), key=lambda size: size[0] * size[1])
+        write_synthetic_tiles(cache_dir / "osm", [ZOOM], *largest)
+        suites: List[Tuple[str, Callable[[], List[Measurement]]]] = [
+            ("render_frame", lambda: bench_render_frame(plan, cache_dir)),
+            ("layout_labels", lambda: bench_layout_labels(plan)),
+            ("get_tile", lambda: bench_get_tile(plan, cache_dir)),
+        ]
+        if video:
+            suites.append(("render_video", lambda: bench_render_video(plan, cache_dir, Path(tmp), encoder)))
+        for name, suite in suites:
+            if log:
+                log(f"Running {name}...")
+            measurements += suite()
+    return {
+        "format": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": {measurement.name: asdict(measurement) for measurement in measurements},
+    }
+
+
+def write_results(path: Path, results: dict) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> List[Comparison]:
+    comparisons = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or not previous["value"] or not math.isfinite(result["value"]):
+            continue
+        change = result["value"] / previous["value"] - 1
+        worse = -change if result["better"] == "higher" else change
+        comparisons.append(Comparison(name, previous["value"], result["value"], change, worse > threshold))
+    return comparisons
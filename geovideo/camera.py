@@ -10,7 +10,7 @@ from geovideo.geo import Bounds, bounds_for_points, choose_zoom_for_bounds
 class CameraState:
     center_lat: float
     center_lon: float
-    zoom: int
+    zoom: float
 
 
 def compute_bounds(center: Tuple[float, float], points: Iterable[Tuple[float, float]]) -> Bounds:
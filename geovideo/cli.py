@@ -1,88 +1,32 @@
 from __future__ import annotations
 
 import json
-import random
 import shutil
 from pathlib import Path
 from typing import Optional
 
-import numpy as np
 import typer
-from moviepy import VideoClip
 
-from geovideo.audio import load_audio, mix_audio
-from geovideo.camera import CameraState, auto_camera
-from geovideo.compositor import Compositor, FrameContext
+from geovideo.benchmarks import QUICK_PLAN, BenchmarkPlan, compare_results, run_benchmarks, write_results
+from geovideo.batch import discover_inputs, run_batch, write_manifest
+from geovideo.compositor import Compositor
+from geovideo.draft import DEFAULT_DRAFT_SCALE, draft_output_path
+from geovideo.encoders import ENCODERS
+from geovideo.prefetch import plan_tiles
+from geovideo.preview import parse_interval, parse_times, preview_times, render_previews, write_previews
+from geovideo.profiling import Profiler, profiling
 from geovideo.providers import build_provider
+from geovideo.providers.disk_cache import index_path, open_tile_store
+from geovideo.providers.pyramid import build_pyramid, pyramid_path
+from geovideo.providers.store import DirectoryTileStore, MBTilesTileStore, copy_tiles, mbtiles_path
+from geovideo.render import build_camera, load_config, prefetch_for_render, render_video
 from geovideo.schemas import InputConfig
+from geovideo.segments import parse_segment, segments_dir
+from geovideo.server import RenderService, create_server
 
 app = typer.Typer(help="Generate vertical real-estate map videos from geographic inputs.")
-
-
-def _load_config(path: Path) -> InputConfig:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    return InputConfig.model_validate(data)
-
-
-def _build_camera(config: InputConfig, fit: str) -> CameraState:
-    points = [(poi.lat, poi.lon) for poi in config.pois]
-    if fit == "center":
-        zoom_override = config.timeline.camera_start_zoom or config.timeline.camera_end_zoom
-        return auto_camera(
-            (config.center.lat, config.center.lon),
-            points,
-            config.style.width,
-            config.style.height,
-            config.style.margin_ratio,
-            zoom_override=zoom_override,
-        )
-    return auto_camera(
-        (config.center.lat, config.center.lon),
-        points,
-        config.style.width,
-        config.style.height,
-        config.style.margin_ratio,
-    )
-
-
-def _render_video(config: InputConfig, seed: Optional[int], fit: str, verbose: bool) -> None:
-    if seed is not None:
-        random.seed(seed)
-        np.random.seed(seed)
-    provider = build_provider(config.provider)
-    camera = _build_camera(config, fit)
-    compositor = Compositor(config, provider)
-
-    def make_frame(t: float) -> np.ndarray:
-        ctx = FrameContext(time_s=t, camera=camera)
-        return compositor.render_frame(ctx)
-
-    clip = VideoClip(make_frame, duration=config.timeline.duration)
-    if verbose:
-        typer.echo("Rendering video frames...")
-
-    tracks = load_audio(config.audio, config.timeline.duration)
-    audio = mix_audio(tracks, config.audio)
-    if audio:
-        clip = clip.with_audio(audio)
-
-    output = Path(config.output.path)
-    output.parent.mkdir(parents=True, exist_ok=True)
-    ffmpeg_params = []
-    if config.output.faststart:
-        ffmpeg_params += ["-movflags", "+faststart"]
-    ffmpeg_params += ["-pix_fmt", "yuv420p", "-crf", str(config.output.crf)]
-    codec_params = {"codec": "libx264", "audio_codec": "aac", "fps": config.style.fps}
-    if config.output.bitrate:
-        codec_params["bitrate"] = config.output.bitrate
-    clip.write_videofile(
-        str(output),
-        **codec_params,
-        preset=config.output.preset,
-        ffmpeg_params=ffmpeg_params,
-        threads=4,
-        logger="bar" if verbose else None,
-    )
+cache_app = typer.Typer(help="Inspect, prune, import and export tile caches.")
+app.add_typer(cache_app, name="cache")
 
 
 @app.command()
@@ -99,11 +43,35 @@ def render(
     user_agent: Optional[str] = typer.Option(None, "--user-agent"),
     seed: Optional[int] = typer.Option(None, "--seed"),
     fit: str = typer.Option("all", "--fit"),
+    workers: int = typer.Option(1, "--workers", min=1, help="Render frames on N worker processes."),
+    encoder: str = typer.Option("moviepy", "--encoder", help="Encoder backend: moviepy or ffmpeg-pipe."),
+    profile: Optional[Path] = typer.Option(None, "--profile", help="Write a Chrome trace of per-stage timings."),
+    draft: bool = typer.Option(False, "--draft", help="Fast low-resolution render for checking timing and layout."),
+    draft_scale: float = typer.Option(
+        DEFAULT_DRAFT_SCALE, "--draft-scale", min=0.05, max=1.0, help="Size and fps factor used by --draft."
+    ),
+    segments: Optional[int] = typer.Option(
+        None, "--segments", min=1, help="Render N resumable segments, then join them without re-encoding."
+    ),
+    segment: Optional[str] = typer.Option(None, "--segment", help="Render only segment i of N, e.g. 2/8."),
     verbose: bool = typer.Option(False, "--verbose"),
 ) -> None:
-    config = _load_config(input)
+    if encoder not in ENCODERS:
+        raise typer.BadParameter(f"--encoder must be one of: {', '.join(ENCODERS)}")
+    only = None
+    if segment:
+        try:
+            only, count = parse_segment(segment)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from None
+        if segments and segments != count:
+            raise typer.BadParameter("--segment and --segments disagree on the segment count")
+        segments = count
+    config = load_config(input)
     if out:
         config.output.path = str(out)
+    elif draft:
+        config.output.path = draft_output_path(config.output.path)
     if fps:
         config.style.fps = fps
     if duration:
@@ -121,30 +89,192 @@ def render(
     if user_agent:
         config.provider.user_agent = user_agent
     config = InputConfig.model_validate(config.model_dump())
-    _render_video(config, seed, fit, verbose)
+    with profiling(profile is not None) as profiler:
+        stats = render_video(
+            config,
+            seed=seed,
+            fit=fit,
+            workers=workers,
+            encoder=encoder,
+            verbose=verbose,
+            log=typer.echo if verbose else None,
+            draft_scale=draft_scale if draft else None,
+            segments=segments,
+            segment=only,
+        )
+    if segments:
+        typer.echo(
+            f"Segments: {stats.segments_rendered} rendered, {stats.segments_skipped} skipped"
+            f" ({segments_dir(config.output.path)})"
+        )
+        if stats.segments_joined:
+            typer.echo(f"Joined segments into {config.output.path}")
+    if profiler is not None:
+        _report_profile(profiler, profile)
+
+
+def _report_profile(profiler: Profiler, path: Path) -> None:
+    profiler.write_trace(path)
+    typer.echo(profiler.format_summary())
+    typer.echo(f"Trace written to {path} (open in chrome://tracing or ui.perfetto.dev)")
+
+
+@app.command()
+def batch(
+    inputs: Path = typer.Option(..., "--inputs", exists=True, help="Directory of JSON configs or a single config."),
+    jobs: int = typer.Option(2, "--jobs", min=1, help="Number of videos rendered concurrently."),
+    out_dir: Optional[Path] = typer.Option(None, "--out-dir", help="Write each video to OUT_DIR/<input stem>.mp4 (default: next to its input)."),
+    manifest: Path = typer.Option(Path("batch-manifest.json"), "--manifest"),
+    fit: str = typer.Option("all", "--fit"),
+    workers: int = typer.Option(1, "--workers", min=1, help="Frame worker processes per job."),
+    encoder: str = typer.Option("moviepy", "--encoder", help="Encoder backend: moviepy or ffmpeg-pipe."),
+    memory_cache_mb: int = typer.Option(512, "--memory-cache-mb", min=0, help="Shared decoded tile cache size."),
+) -> None:
+    if encoder not in ENCODERS:
+        raise typer.BadParameter(f"--encoder must be one of: {', '.join(ENCODERS)}")
+    paths = discover_inputs(inputs)
+    if not paths:
+        typer.echo("No input configs found.")
+        return
+    typer.echo(f"Rendering {len(paths)} videos with {jobs} jobs...")
+    try:
+        results = run_batch(
+            paths,
+            jobs,
+            out_dir=out_dir,
+            fit=fit,
+            encoder=encoder,
+            workers=workers,
+            memory_cache_bytes=memory_cache_mb * 1024 * 1024,
+            log=typer.echo,
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--inputs") from exc
+    write_manifest(manifest, results)
+    failed = sum(1 for result in results if result.status != "ok")
+    typer.echo(f"{len(results) - failed} succeeded, {failed} failed. Manifest: {manifest}")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8765, "--port"),
+    jobs: int = typer.Option(2, "--jobs", min=1, help="Jobs run concurrently; the rest wait in the queue."),
+    out_dir: Path = typer.Option(
+        Path("renders"), "--out-dir", help="Directory holding every job output; job paths resolve inside it."
+    ),
+    memory_cache_mb: int = typer.Option(512, "--memory-cache-mb", min=0, help="Shared decoded tile cache size."),
+    cache_dir: Path = typer.Option(Path(".cache"), "--cache-dir", help="Tile and audio caches used by every job."),
+    assets_dir: Optional[Path] = typer.Option(
+        None, "--assets-dir", help="Fonts, overlays and audio that jobs may reference (none if unset)."
+    ),
+) -> None:
+    service = RenderService(
+        out_dir,
+        jobs=jobs,
+        memory_cache_bytes=memory_cache_mb * 1024 * 1024,
+        log=typer.echo,
+        cache_dir=cache_dir,
+        assets_dir=assets_dir,
+    )
+    server = create_server(service, host, port)
+    typer.echo(f"Serving on http://{host}:{server.server_address[1]} with {jobs} concurrent jobs (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
 
 
 @app.command()
 def preview(
     input: Path = typer.Option(..., "--input", exists=True),
-    frame_time: float = typer.Option(3.2, "--frame-time"),
+    frame_time: Optional[float] = typer.Option(None, "--frame-time", help="Single frame time (default 3.2)."),
+    times: Optional[str] = typer.Option(None, "--times", help="Comma-separated frame times, e.g. 0,1.5,3."),
+    every: Optional[str] = typer.Option(None, "--every", help="Sample the whole timeline, e.g. 0.5s or 250ms."),
+    sheet: bool = typer.Option(False, "--sheet", help="Write one contact-sheet grid instead of separate images."),
+    columns: Optional[int] = typer.Option(None, "--columns", min=1, help="Contact-sheet columns."),
+    thumb_width: int = typer.Option(270, "--thumb-width", min=16, help="Contact-sheet thumbnail width."),
     out: Path = typer.Option(..., "--out"),
+    profile: Optional[Path] = typer.Option(None, "--profile", help="Write a Chrome trace of per-stage timings."),
+) -> None:
+    config = load_config(input)
+    try:
+        requested = ([frame_time] if frame_time is not None else []) + (parse_times(times) if times else [])
+        interval = parse_interval(every) if every else None
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if not requested and interval is None:
+        requested = [3.2]
+    selected = preview_times(config.timeline.duration, interval, requested)
+    with profiling(profile is not None) as profiler:
+        provider = build_provider(config.provider)
+        camera = build_camera(config, fit="all")
+        compositor = Compositor(config, provider)
+        frames = render_previews(compositor, camera, selected)
+        write_previews(frames, out, sheet, columns, thumb_width)
+    if sheet:
+        typer.echo(f"Wrote contact sheet of {len(frames)} frames to {out}")
+    elif len(frames) > 1:
+        typer.echo(f"Wrote {len(frames)} frames next to {out}")
+    if profiler is not None:
+        _report_profile(profiler, profile)
+
+
+@app.command()
+def prefetch(
+    input: Path = typer.Option(..., "--input", exists=True),
+    cache_dir: Optional[str] = typer.Option(None, "--cache-dir"),
+    user_agent: Optional[str] = typer.Option(None, "--user-agent"),
+    fit: str = typer.Option("all", "--fit"),
 ) -> None:
-    config = _load_config(input)
+    config = load_config(input)
+    if cache_dir:
+        config.provider.cache_dir = cache_dir
+    if user_agent:
+        config.provider.user_agent = user_agent
     provider = build_provider(config.provider)
-    camera = _build_camera(config, fit="all")
-    compositor = Compositor(config, provider)
-    ctx = FrameContext(time_s=frame_time, camera=camera)
-    frame = compositor.render_frame(ctx)
-    Path(out).parent.mkdir(parents=True, exist_ok=True)
-    import cv2
+    camera = build_camera(config, fit)
+    prefetch_for_render(config, provider, camera, log=typer.echo)
 
-    cv2.imwrite(str(out), frame)
+
+@app.command()
+def bench(
+    out: Path = typer.Option(Path("bench.json"), "--out", help="Where to write benchmark results."),
+    compare: Optional[Path] = typer.Option(None, "--compare", exists=True, help="Baseline results to compare against."),
+    threshold: float = typer.Option(0.1, "--threshold", min=0, help="Relative slowdown reported as a regression."),
+    quick: bool = typer.Option(False, "--quick", help="Tiny sizes for a fast smoke run."),
+    video: bool = typer.Option(True, "--video/--no-video", help="Include the end-to-end render benchmark."),
+    encoder: str = typer.Option("ffmpeg-pipe", "--encoder", help="Encoder backend for the end-to-end benchmark."),
+    fail_on_regression: bool = typer.Option(False, "--fail-on-regression"),
+) -> None:
+    if encoder not in ENCODERS:
+        raise typer.BadParameter(f"--encoder must be one of: {', '.join(ENCODERS)}")
+    plan = QUICK_PLAN if quick else BenchmarkPlan()
+    results = run_benchmarks(plan, encoder=encoder, video=video, log=typer.echo)
+    write_results(out, results)
+    for name, result in results["results"].items():
+        typer.echo(f"{name:<48} {result['value']:>10.2f} {result['unit']}")
+    typer.echo(f"Results written to {out}")
+    if compare is None:
+        return
+    comparisons = compare_results(json.loads(compare.read_text(encoding="utf-8")), results, threshold)
+    regressions = [item for item in comparisons if item.regression]
+    for item in comparisons:
+        marker = "REGRESSION" if item.regression else ""
+        typer.echo(f"{item.name:<48} {item.baseline:>10.2f} -> {item.current:>10.2f} {item.change:>+7.1%} {marker}")
+    typer.echo(f"{len(regressions)} regressions against {compare}")
+    if regressions and fail_on_regression:
+        raise typer.Exit(code=1)
 
 
 @app.command()
 def validate(input: Path = typer.Option(..., "--input", exists=True)) -> None:
-    _ = _load_config(input)
+    _ = load_config(input)
     typer.echo("Valid configuration")
 
 
@@ -158,7 +288,12 @@ def clear_cache(
     if provider_name not in {"osm", "mapbox", "custom", "all"}:
         raise typer.BadParameter("--provider must be one of: osm, mapbox, custom, all")
 
-    targets = [cache_dir] if provider_name == "all" else [cache_dir / provider_name]
+    if provider_name == "all":
+        targets = [cache_dir]
+    else:
+        targets = [cache_dir / provider_name]
+        for database in (mbtiles_path(cache_dir, provider_name), index_path(cache_dir, provider_name)):
+            targets += [database, *(database.with_name(database.name + s) for s in ("-wal", "-shm"))]
     existing_targets = [target for target in targets if target.exists()]
     if not existing_targets:
         typer.echo("No cache directory found to clear.")
@@ -168,13 +303,130 @@ def clear_cache(
         if not yes and not typer.confirm(f"Delete cache at '{target}'?"):
             typer.echo("Cancelled.")
             return
-        shutil.rmtree(target)
+        if target.is_dir():
+            shutil.rmtree(target)
+        else:
+            target.unlink()
         typer.echo(f"Cleared cache: {target}")
 
 
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@cache_app.command("stats")
+def cache_stats(
+    provider: str = typer.Option("osm", "--provider", help="Cache namespace: osm, mapbox, or custom."),
+    cache_dir: Path = typer.Option(Path(".cache/tiles"), "--cache-dir", help="Base cache directory."),
+    backend: str = typer.Option("directory", "--backend", help="Tile store backend: directory or mbtiles."),
+) -> None:
+    store = open_tile_store(cache_dir, provider, backend)
+    try:
+        store.sync()
+        rows = store.stats()
+    finally:
+        store.close()
+    if not rows:
+        typer.echo("Cache is empty.")
+        return
+    typer.echo(f"{'zoom':>4}  {'tiles':>8}  {'size':>10}  {'hits':>8}  {'misses':>8}  {'hit ratio':>9}")
+    for row in rows:
+        typer.echo(
+            f"{row.zoom:>4}  {row.tiles:>8}  {_format_bytes(row.bytes):>10}  {row.hits:>8}  {row.misses:>8}  "
+            f"{row.hit_ratio:>9.1%}"
+        )
+    hits = sum(row.hits for row in rows)
+    misses = sum(row.misses for row in rows)
+    ratio = hits / (hits + misses) if hits + misses else 0.0
+    typer.echo(
+        f"{'all':>4}  {sum(row.tiles for row in rows):>8}  {_format_bytes(sum(row.bytes for row in rows)):>10}  "
+        f"{hits:>8}  {misses:>8}  {ratio:>9.1%}"
+    )
+
+
+@cache_app.command("prune")
+def cache_prune(
+    provider: str = typer.Option("osm", "--provider", help="Cache namespace: osm, mapbox, or custom."),
+    cache_dir: Path = typer.Option(Path(".cache/tiles"), "--cache-dir", help="Base cache directory."),
+    backend: str = typer.Option("directory", "--backend", help="Tile store backend: directory or mbtiles."),
+    max_mb: Optional[float] = typer.Option(None, "--max-mb", min=0, help="Evict least recently used tiles above this size."),
+    ttl_days: Optional[float] = typer.Option(None, "--ttl-days", min=0, help="Drop tiles fetched longer ago than this."),
+) -> None:
+    if max_mb is None and ttl_days is None:
+        raise typer.BadParameter("Pass --max-mb and/or --ttl-days")
+    store = open_tile_store(cache_dir, provider, backend)
+    try:
+        store.sync()
+        result = store.prune(
+            max_bytes=int(max_mb * 1024 * 1024) if max_mb is not None else None,
+            ttl_s=ttl_days * 86400 if ttl_days is not None else None,
+        )
+    finally:
+        store.close()
+    typer.echo(
+        f"Removed {result.expired} expired and {result.evicted} least recently used tiles "
+        f"({_format_bytes(result.freed_bytes)} freed)."
+    )
+
+
+@cache_app.command("pyramid")
+def cache_pyramid(
+    provider: str = typer.Option("osm", "--provider", help="Cache namespace: osm, mapbox, or custom."),
+    cache_dir: Path = typer.Option(Path(".cache/tiles"), "--cache-dir", help="Base cache directory."),
+    backend: str = typer.Option("directory", "--backend", help="Tile store backend: directory or mbtiles."),
+    input: Optional[Path] = typer.Option(None, "--input", exists=True, help="Only convert the tiles this project uses."),
+    fit: str = typer.Option("all", "--fit"),
+    out: Optional[Path] = typer.Option(None, "--out", help="Pyramid file (defaults to <cache-dir>/<provider>.pyramid.npy)."),
+) -> None:
+    tiles = None
+    if input is not None:
+        config = load_config(input)
+        provider, cache_dir, backend = config.provider.name, Path(config.provider.cache_dir), config.provider.cache_backend
+        tiles = plan_tiles(config, build_camera(config, fit))
+    store = open_tile_store(cache_dir, provider, backend)
+    target = out or pyramid_path(cache_dir, provider)
+    try:
+        converted = build_pyramid(store.store, target, tiles)
+    finally:
+        store.close()
+    typer.echo(f"Wrote {converted} decoded tiles to {target}")
+    typer.echo(f'Set "provider.pyramid_path": "{target}" to render from it.')
+
+
+@cache_app.command("import")
+def cache_import(
+    source: Path = typer.Option(..., "--from", exists=True, file_okay=False, help="Tile directory laid out as z/x/y.png."),
+    target: Path = typer.Option(..., "--to", help="MBTiles archive to create or extend."),
+    name: str = typer.Option("geovideo", "--name", help="Archive name stored in the metadata table."),
+) -> None:
+    store = MBTilesTileStore(target, name=name)
+    try:
+        copied = copy_tiles(DirectoryTileStore(source), store)
+        typer.echo(f"Imported {copied} tiles into {target} ({store.unique_images()} unique images)")
+    finally:
+        store.close()
+
+
+@cache_app.command("export")
+def cache_export(
+    source: Path = typer.Option(..., "--from", exists=True, dir_okay=False, help="MBTiles archive to read."),
+    target: Path = typer.Option(..., "--to", help="Directory to write z/x/y.png tiles into."),
+) -> None:
+    store = MBTilesTileStore(source)
+    try:
+        copied = copy_tiles(store, DirectoryTileStore(target))
+    finally:
+        store.close()
+    typer.echo(f"Exported {copied} tiles to {target}")
+
+
 @app.command()
 def demo(out: Path = typer.Option("demo.mp4", "--out"), verbose: bool = False) -> None:
     sample = Path("examples/project.sample.json")
-    config = _load_config(sample)
+    config = load_config(sample)
     config.output.path = str(out)
-    _render_video(config, seed=42, fit="all", verbose=verbose)
+    render_video(config, seed=42, verbose=verbose, log=typer.echo if verbose else None)
@@ -1,20 +1,28 @@
 from __future__ import annotations
 
 import math
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
 
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from geovideo.basemap import Mosaic, build_mosaic, crop_view, deep_mosaic_extent, overzoom_extent, warp_view
 from geovideo.camera import CameraState
-from geovideo.draw import draw_pin, draw_ring, layout_labels, load_font
-from geovideo.geo import TILE_SIZE, latlon_to_screen_px, latlon_to_world_px, world_px_to_tile
+from geovideo.draw import LabelPlacement, layout_labels, load_font
+from geovideo.geo import latlon_to_screen_px_array
+from geovideo.profiling import stage
 from geovideo.providers.base import TileProvider
 from geovideo.schemas import InputConfig, Poi
-from geovideo.timeline import timeline_state_at
+from geovideo.sprites import SpriteAtlas, blit, ring_step
+from geovideo.timeline import CompiledTimeline, TimelineState, camera_zoom_range, compile_timeline
+
+MAX_CACHED_ZOOM_LEVELS = 4
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -23,154 +31,266 @@ class FrameContext:
     camera: CameraState
 
 
+@dataclass(frozen=True)
+class ProjectedGeometry:
+    center: np.ndarray
+    pois: np.ndarray
+    polygon: np.ndarray
+
+
+@dataclass(frozen=True)
+class StaticLayers:
+    background: Image.Image
+    foreground: Image.Image
+
+
 class Compositor:
-    def __init__(self, config: InputConfig, provider: TileProvider) -> None:
+    def __init__(self, config: InputConfig, provider: TileProvider, scale: float = 1.0) -> None:
         self.config = config
         self.provider = provider
-        self.font = load_font(config.style.font_path, size=32)
-        self.small_font = load_font(config.style.font_path, size=24)
+        self.scale = scale
+        self.zoom_offset = math.log2(scale)
+        self.font = load_font(config.style.font_path, size=max(round(32 * scale), 1))
+        self.small_font = load_font(config.style.font_path, size=max(round(24 * scale), 1))
+        self.sprites = SpriteAtlas(self.small_font, scale)
+        if config.pois and config.style.show_rings:
+            self.sprites.prepare_rings()
         self.overlay: Optional[Image.Image] = None
         if config.style.overlay_path:
             self.overlay = Image.open(config.style.overlay_path).convert("RGBA")
+        self._mosaics: "OrderedDict[Tuple[CameraState, int, int], Mosaic]" = OrderedDict()
+        self._layers: "OrderedDict[Tuple[CameraState, int, int], StaticLayers]" = OrderedDict()
+        self._screen: Optional[Image.Image] = None
+        self._deep: Optional[Tuple[Tuple[CameraState, int, int], Mosaic]] = None
+        self._label_layouts: "OrderedDict[Tuple[CameraState, int, int], List[LabelPlacement]]" = OrderedDict()
+        self._projections: "OrderedDict[Tuple[CameraState, int, int], ProjectedGeometry]" = OrderedDict()
+        self._timelines: Dict[float, CompiledTimeline] = {}
+        locations = [config.center, *config.pois, *(config.style.polygon_points or [])]
+        self._latlon = np.array([[location.lat, location.lon] for location in locations], dtype=np.float64)
 
     def render_frame(self, ctx: FrameContext) -> np.ndarray:
+        frame = self.render_rgb(ctx)
+        with stage("compositor.color_convert"):
+            return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+    def render_rgb(self, ctx: FrameContext) -> np.ndarray:
         style = self.config.style
         width, height = style.width, style.height
-        timeline_state = timeline_state_at(
-            ctx.time_s, len(self.config.pois), self.config.timeline, ctx.camera.zoom
-        )
+        camera, timeline_state = self._frame_state(ctx)
+        with stage("compositor.static_layers"):
+            layers = self._static_layers(ctx.camera, camera, width, height)
+        with stage("compositor.dynamic"):
+            base = layers.background.copy()
+            self._draw_active_poi(base, camera, timeline_state.active_index)
+            self._draw_rings(base, camera, timeline_state)
+        with stage("compositor.composite"):
+            base.alpha_composite(layers.foreground)
+            return np.array(base.convert("RGB"))
+
+    def frame_key(self, ctx: FrameContext) -> Tuple[Hashable, ...]:
+        camera, timeline_state = self._frame_state(ctx)
+        ring = self._ring_step(timeline_state) if self.config.style.show_rings else None
+        return (camera, timeline_state.active_index, ring)
+
+    def _frame_state(self, ctx: FrameContext) -> Tuple[CameraState, TimelineState]:
+        timeline_state = self.timeline(ctx.camera.zoom).state_at(ctx.time_s)
+        zoom = timeline_state.camera_zoom
+        if not self.config.timeline.smooth_zoom:
+            zoom = int(round(zoom))
         camera = CameraState(
             center_lat=ctx.camera.center_lat,
             center_lon=ctx.camera.center_lon,
-            zoom=int(round(timeline_state.camera_zoom)),
+            zoom=zoom + self.zoom_offset if self.zoom_offset else zoom,
+        )
+        return camera, timeline_state
+
+    def timeline(self, default_zoom: float) -> CompiledTimeline:
+        timeline = self._timelines.get(default_zoom)
+        if timeline is None:
+            config = self.config
+            timeline = compile_timeline(config.timeline, len(config.pois), config.style.fps, default_zoom)
+            self._timelines[default_zoom] = timeline
+        return timeline
+
+    def _static_layers(
+        self, base: CameraState, camera: CameraState, width: int, height: int
+    ) -> StaticLayers:
+        return self._cached(
+            self._layers, camera, width, height, lambda: self._build_static_layers(base, camera, width, height)
+        )
+
+    def _build_static_layers(
+        self, base: CameraState, camera: CameraState, width: int, height: int
+    ) -> StaticLayers:
+        with stage("basemap.render"):
+            background = self._render_basemap(base, camera, width, height)
+        with stage("vector.draw"):
+            draw = ImageDraw.Draw(background, "RGBA")
+            self._draw_polygon(draw, camera)
+            self._draw_connectors(draw, camera)
+            background = background.convert("RGBA")
+            self._draw_pois(background, camera)
+            foreground = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            self._draw_labels(foreground, camera)
+            foreground.alpha_composite(self._screen_layer(width, height))
+        return StaticLayers(background=background, foreground=foreground)
+
+    def _screen_layer(self, width: int, height: int) -> Image.Image:
+        if self._screen is None or self._screen.size != (width, height):
+            layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(layer)
+            self._draw_subtitle(draw, width, height)
+            self._draw_overlay(layer, width, height)
+            self._draw_attribution(draw, width, height)
+            self._screen = layer
+        return self._screen
+
+    def _render_basemap(
+        self, base: CameraState, camera: CameraState, width: int, height: int
+    ) -> Image.Image:
+        if self.config.timeline.smooth_zoom:
+            mosaic = self._deep_mosaic(base, width, height)
+            return warp_view(mosaic, camera.center_lat, camera.center_lon, camera.zoom, width, height)
+        tile_zoom, cover_w, cover_h = overzoom_extent(camera.zoom, width, height)
+        mosaic = self._cached(
+            self._mosaics,
+            camera,
+            width,
+            height,
+            lambda: build_mosaic(self.provider, camera.center_lat, camera.center_lon, tile_zoom, cover_w, cover_h),
+        )
+        if tile_zoom != camera.zoom:
+            return warp_view(mosaic, camera.center_lat, camera.center_lon, camera.zoom, width, height)
+        return crop_view(mosaic, camera.center_lat, camera.center_lon, width, height)
+
+    def _deep_mosaic(self, base: CameraState, width: int, height: int) -> Mosaic:
+        key = (base, width, height)
+        if self._deep is None or self._deep[0] != key:
+            min_zoom, max_zoom = camera_zoom_range(self.config.timeline, base.zoom)
+            zoom, cover_w, cover_h = deep_mosaic_extent(
+                min_zoom + self.zoom_offset, max_zoom + self.zoom_offset, width, height
+            )
+            mosaic = build_mosaic(self.provider, base.center_lat, base.center_lon, zoom, cover_w, cover_h)
+            self._deep = (key, mosaic)
+        return self._deep[1]
+
+    def _cached(
+        self,
+        cache: "OrderedDict[Tuple[CameraState, int, int], T]",
+        camera: CameraState,
+        width: int,
+        height: int,
+        build: Callable[[], T],
+    ) -> T:
+        key = (camera, width, height)
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+        self._evict_passed_zooms(cache, camera.zoom)
+        value = build()
+        cache[key] = value
+        while len(cache) > MAX_CACHED_ZOOM_LEVELS:
+            cache.popitem(last=False)
+        return value
+
+    def _evict_passed_zooms(self, cache: OrderedDict, zoom: float) -> None:
+        timeline = self.config.timeline
+        start = timeline.camera_start_zoom or zoom
+        end = timeline.camera_end_zoom or zoom
+        direction = (end > start) - (end < start)
+        for key in list(cache):
+            if (key[0].zoom - zoom) * direction < 0:
+                del cache[key]
+
+    def _project(self, camera: CameraState) -> ProjectedGeometry:
+        style = self.config.style
+        return self._cached(
+            self._projections, camera, style.width, style.height, lambda: self._build_projection(camera)
         )
-        base = self._render_basemap(camera, width, height).convert("RGBA")
-        draw = ImageDraw.Draw(base)
-        self._draw_polygon(draw, camera)
-        self._draw_connectors(draw, camera)
-        self._draw_pois(draw, camera, timeline_state.active_index)
-        self._draw_rings(draw, camera, timeline_state)
-        self._draw_labels(draw, camera)
-        self._draw_subtitle(draw, width, height)
-        self._draw_overlay(base, width, height)
-        self._draw_attribution(draw, width, height)
-        array = np.array(base.convert("RGB"))
-        return cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
-
-    def _render_basemap(self, camera: CameraState, width: int, height: int) -> Image.Image:
-        center_x, center_y = latlon_to_world_px(camera.center_lat, camera.center_lon, camera.zoom)
-        top_left_x = center_x - width / 2
-        top_left_y = center_y - height / 2
-        start_tile_x, start_tile_y = world_px_to_tile(top_left_x, top_left_y)
-        end_tile_x, end_tile_y = world_px_to_tile(top_left_x + width, top_left_y + height)
-
-        canvas = Image.new("RGB", (width, height))
-        for tile_x in range(start_tile_x, end_tile_x + 1):
-            for tile_y in range(start_tile_y, end_tile_y + 1):
-                tile = self.provider.get_tile(camera.zoom, tile_x, tile_y)
-                px = int(tile_x * TILE_SIZE - top_left_x)
-                py = int(tile_y * TILE_SIZE - top_left_y)
-                canvas.paste(tile, (px, py))
-        return canvas
+
+    def _build_projection(self, camera: CameraState) -> ProjectedGeometry:
+        style = self.config.style
+        points = latlon_to_screen_px_array(
+            self._latlon[:, 0],
+            self._latlon[:, 1],
+            camera.zoom,
+            camera.center_lat,
+            camera.center_lon,
+            style.width,
+            style.height,
+        )
+        poi_end = 1 + len(self.config.pois)
+        return ProjectedGeometry(center=points[0], pois=points[1:poi_end], polygon=points[poi_end:])
 
     def _draw_polygon(self, draw: ImageDraw.ImageDraw, camera: CameraState) -> None:
         style = self.config.style
         if not style.show_polygon or not style.polygon_points:
             return
-        points: List[Tuple[float, float]] = []
-        for location in style.polygon_points:
-            x, y = latlon_to_screen_px(
-                location.lat,
-                location.lon,
-                camera.zoom,
-                camera.center_lat,
-                camera.center_lon,
-                style.width,
-                style.height,
-            )
-            points.append((x, y))
+        points = self._project(camera).polygon
         if len(points) < 3:
             return
-        draw.polygon(points, fill=(0, 128, 255, 70), outline=(0, 128, 255))
+        draw.polygon([tuple(point) for point in points.tolist()], fill=(0, 128, 255, 70), outline=(0, 128, 255))
 
     def _draw_connectors(self, draw: ImageDraw.ImageDraw, camera: CameraState) -> None:
         if not self.config.style.show_connectors:
             return
-        center = self.config.center
-        for poi in self.config.pois:
-            x1, y1 = latlon_to_screen_px(
-                center.lat,
-                center.lon,
-                camera.zoom,
-                camera.center_lat,
-                camera.center_lon,
-                self.config.style.width,
-                self.config.style.height,
-            )
-            x2, y2 = latlon_to_screen_px(
-                poi.lat,
-                poi.lon,
-                camera.zoom,
-                camera.center_lat,
-                camera.center_lon,
-                self.config.style.width,
-                self.config.style.height,
-            )
-            draw.line((x1, y1, x2, y2), fill=(255, 255, 255, 120), width=2)
-
-    def _draw_pois(self, draw: ImageDraw.ImageDraw, camera: CameraState, active_index: int) -> None:
-        for idx, poi in enumerate(self.config.pois):
-            x, y = latlon_to_screen_px(
-                poi.lat,
-                poi.lon,
-                camera.zoom,
-                camera.center_lat,
-                camera.center_lon,
-                self.config.style.width,
-                self.config.style.height,
-            )
-            color = _poi_color(poi)
-            if idx == active_index:
-                color = tuple(min(c + 40, 255) for c in color)
-            draw_pin(draw, int(x), int(y), color)
+        projected = self._project(camera)
+        x1, y1 = projected.center.tolist()
+        width = max(round(2 * self.scale), 1)
+        for x2, y2 in projected.pois.tolist():
+            draw.line((x1, y1, x2, y2), fill=(255, 255, 255, 120), width=width)
+
+    def _draw_pois(self, base: Image.Image, camera: CameraState) -> None:
+        points = self._project(camera).pois.tolist()
+        for poi, (x, y) in zip(self.config.pois, points):
+            blit(base, self.sprites.pin(_poi_color(poi)), int(x), int(y))
 
-    def _draw_rings(self, draw: ImageDraw.ImageDraw, camera: CameraState, timeline_state) -> None:
-        if not self.config.pois:
+    def _draw_active_poi(self, base: Image.Image, camera: CameraState, active_index: int) -> None:
+        if not 0 <= active_index < len(self.config.pois):
+            return
+        x, y = self._project(camera).pois[active_index].tolist()
+        color = tuple(min(c + 40, 255) for c in _poi_color(self.config.pois[active_index]))
+        blit(base, self.sprites.pin(color), int(x), int(y))
+
+    def _draw_rings(self, base: Image.Image, camera: CameraState, timeline_state: TimelineState) -> None:
+        if not self.config.pois or not self.config.style.show_rings:
             return
         idx = min(timeline_state.active_index, len(self.config.pois) - 1)
-        poi = self.config.pois[idx]
-        x, y = latlon_to_screen_px(
-            poi.lat,
-            poi.lon,
-            camera.zoom,
-            camera.center_lat,
-            camera.center_lon,
-            self.config.style.width,
-            self.config.style.height,
+        x, y = self._project(camera).pois[idx].tolist()
+        blit(base, self.sprites.ring(self._ring_step(timeline_state)), int(x), int(y))
+
+    def _ring_step(self, timeline_state: TimelineState) -> int:
+        return ring_step(timeline_state.ring_phase)
+
+    def _label_placements(self, camera: CameraState) -> List[LabelPlacement]:
+        style = self.config.style
+        layout_zoom = int(round(camera.zoom - self.zoom_offset)) + self.zoom_offset
+        layout_camera = CameraState(camera.center_lat, camera.center_lon, layout_zoom)
+        placements = self._cached(
+            self._label_layouts,
+            layout_camera,
+            style.width,
+            style.height,
+            lambda: layout_labels(self._label_anchors(layout_camera), self.small_font, scale=self.scale),
         )
-        period = max(self.config.timeline.ring_period, 0.1)
-        phase = (timeline_state.reveal_progress + (timeline_state.active_index * 0.3)) % 1.0
-        radius = int(24 + phase * 40)
-        alpha = int(200 * (1 - phase))
-        draw_ring(draw, int(x), int(y), radius, alpha)
-
-    def _draw_labels(self, draw: ImageDraw.ImageDraw, camera: CameraState) -> None:
-        labels = []
-        for poi in self.config.pois:
-            x, y = latlon_to_screen_px(
-                poi.lat,
-                poi.lon,
-                camera.zoom,
-                camera.center_lat,
-                camera.center_lon,
-                self.config.style.width,
-                self.config.style.height,
+        if layout_camera == camera:
+            return placements
+        moved = {
+            layout_anchor: anchor
+            for (_, layout_anchor), (_, anchor) in zip(
+                self._label_anchors(layout_camera), self._label_anchors(camera)
             )
-            labels.append((poi.name, (int(x), int(y))))
-        placements = layout_labels(self._dummy_canvas(), labels, self.small_font)
-        for placement in placements:
-            draw.rounded_rectangle(placement.box, radius=8, fill=(0, 0, 0, 180))
-            draw.text(placement.position, placement.text, font=self.small_font, fill=(255, 255, 255))
+        }
+        return [placement.moved_to(moved[placement.anchor]) for placement in placements]
+
+    def _label_anchors(self, camera: CameraState) -> List[Tuple[str, Tuple[int, int]]]:
+        points = self._project(camera).pois.tolist()
+        return [(poi.name, (int(x), int(y))) for poi, (x, y) in zip(self.config.pois, points)]
+
+    def _draw_labels(self, layer: Image.Image, camera: CameraState) -> None:
+        for placement in self._label_placements(camera):
+            blit(layer, self.sprites.badge(placement.text), *placement.position)
 
     def _draw_subtitle(self, draw: ImageDraw.ImageDraw, width: int, height: int) -> None:
         if not self.config.style.subtitle:
@@ -179,9 +299,10 @@ class Compositor:
         text_w, text_h = self.font.getbbox(text)[2:4]
         x = (width - text_w) // 2
         y = height - text_h - self.config.style.safe_margin_px
+        pad_x, pad_y = round(20 * self.scale), round(12 * self.scale)
         draw.rounded_rectangle(
-            (x - 20, y - 12, x + text_w + 20, y + text_h + 12),
-            radius=12,
+            (x - pad_x, y - pad_y, x + text_w + pad_x, y + text_h + pad_y),
+            radius=max(pad_y, 1),
             fill=(0, 0, 0, 160),
         )
         draw.text((x, y), text, font=self.font, fill=(255, 255, 255))
@@ -192,19 +313,36 @@ class Compositor:
         overlay = self.overlay
         ratio = min(width / overlay.width, height / overlay.height)
         scaled = overlay.resize((int(overlay.width * ratio), int(overlay.height * ratio)))
-        x = width - scaled.width - 20
+        x = width - scaled.width - round(20 * self.scale)
         y = int(height * 0.2)
         base.alpha_composite(scaled, (x, y))
 
     def _draw_attribution(self, draw: ImageDraw.ImageDraw, width: int, height: int) -> None:
         text = self.config.style.watermark_text or self.provider.attribution
         text_w, text_h = self.small_font.getbbox(text)[2:4]
-        x = width - text_w - 12
-        y = height - text_h - 12
+        margin = round(12 * self.scale)
+        x = width - text_w - margin
+        y = height - text_h - margin
         draw.text((x, y), text, font=self.small_font, fill=(255, 255, 255))
 
-    def _dummy_canvas(self) -> Image.Image:
-        return Image.new("RGB", (self.config.style.width, self.config.style.height))
+
+class FrameHold:
+    def __init__(self, compositor: Compositor) -> None:
+        self.compositor = compositor
+        self.rendered = 0
+        self.held = 0
+        self._key: Optional[Tuple[Hashable, ...]] = None
+        self._frame: Optional[np.ndarray] = None
+
+    def render_rgb(self, ctx: FrameContext) -> np.ndarray:
+        key = self.compositor.frame_key(ctx)
+        if self._frame is not None and key == self._key:
+            self.held += 1
+            return self._frame
+        self._key = key
+        self._frame = self.compositor.render_rgb(ctx)
+        self.rendered += 1
+        return self._frame
 
 
 def _poi_color(poi: Poi) -> Tuple[int, int, int]:
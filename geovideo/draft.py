@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from geovideo.schemas import InputConfig
+
+DEFAULT_DRAFT_SCALE = 0.5
+DRAFT_PRESET = "ultrafast"
+DRAFT_CRF = 30
+
+
+def _even(value: float) -> int:
+    return max(int(round(value / 2)) * 2, 2)
+
+
+def draft_config(config: InputConfig, scale: float = DEFAULT_DRAFT_SCALE) -> InputConfig:
+    if not 0 < scale <= 1:
+        raise ValueError("Draft scale must be in (0, 1]")
+    draft = config.model_copy(deep=True)
+    draft.style.width = _even(config.style.width * scale)
+    draft.style.height = _even(config.style.height * scale)
+    draft.style.fps = max(int(round(config.style.fps * scale)), 1)
+    draft.style.safe_margin_px = int(round(config.style.safe_margin_px * scale))
+    draft.style.overlay_path = None
+    draft.style.show_rings = False
+    draft.output.preset = DRAFT_PRESET
+    draft.output.crf = max(config.output.crf, DRAFT_CRF)
+    draft.output.bitrate = None
+    draft.output.renditions = []
+    return draft
+
+
+def draft_output_path(path: str) -> str:
+    output = Path(path)
+    return str(output.with_name(f"{output.stem}.draft{output.suffix or '.mp4'}"))
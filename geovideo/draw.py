@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -11,8 +12,20 @@ class LabelPlacement:
     text: str
     position: Tuple[int, int]
     box: Tuple[int, int, int, int]
+    anchor: Tuple[int, int] = (0, 0)
 
+    def moved_to(self, anchor: Tuple[int, int]) -> "LabelPlacement":
+        dx, dy = anchor[0] - self.anchor[0], anchor[1] - self.anchor[1]
+        box = self.box
+        return LabelPlacement(
+            text=self.text,
+            position=(self.position[0] + dx, self.position[1] + dy),
+            box=(box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy),
+            anchor=anchor,
+        )
 
+
+@lru_cache(maxsize=32)
 def load_font(font_path: Optional[str], size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
     if font_path:
         try:
@@ -36,26 +49,70 @@ def draw_ring(draw: ImageDraw.ImageDraw, x: int, y: int, radius: int, alpha: int
 
 
 def layout_labels(
-    base: Image.Image,
     labels: Iterable[Tuple[str, Tuple[int, int]]],
     font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
     padding: int = 8,
     max_shift: int = 80,
+    shift_step: int = 18,
+    scale: float = 1.0,
 ) -> List[LabelPlacement]:
     placements: List[LabelPlacement] = []
+    index = _GridIndex()
+    padding, max_shift = round(padding * scale), round(max_shift * scale)
+    shift_step = max(round(shift_step * scale), 1)
     for text, (x, y) in labels:
         width, height = font.getbbox(text)[2:4]
-        shift = 0
-        while shift <= max_shift:
-            left = x + 16
-            top = y - height - 8 + shift
-            box = (left - padding, top - padding, left + width + padding, top + height + padding)
-            if not any(_overlaps(box, placement.box) for placement in placements):
-                placements.append(LabelPlacement(text=text, position=(left, top), box=box))
+        for shift in range(0, max_shift + 1, shift_step):
+            placement = next(
+                (
+                    candidate
+                    for candidate in _candidates(text, x, y, width, height, padding, shift, scale)
+                    if not index.overlaps(candidate.box)
+                ),
+                None,
+            )
+            if placement is not None:
+                index.insert(placement.box)
+                placements.append(placement)
                 break
-            shift += 18
     return placements
 
 
+def _candidates(
+    text: str, x: int, y: int, width: int, height: int, padding: int, shift: int, scale: float = 1.0
+) -> Iterator[LabelPlacement]:
+    side, rise, above, below = (round(offset * scale) for offset in (16, 8, 40, 28))
+    positions = (
+        (x + side, y - height - rise + shift),
+        (x - side - width, y - height - rise + shift),
+        (x - width // 2 + shift, y - height - above),
+        (x - width // 2 + shift, y + below),
+    )
+    for left, top in positions:
+        box = (left - padding, top - padding, left + width + padding, top + height + padding)
+        yield LabelPlacement(text=text, position=(left, top), box=box, anchor=(x, y))
+
+
+class _GridIndex:
+    def __init__(self, cell_size: int = 64) -> None:
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+
+    def _cell_range(self, box: Tuple[int, int, int, int]) -> Iterator[Tuple[int, int]]:
+        size = self.cell_size
+        for cell_x in range(box[0] // size, box[2] // size + 1):
+            for cell_y in range(box[1] // size, box[3] // size + 1):
+                yield cell_x, cell_y
+
+    def overlaps(self, box: Tuple[int, int, int, int]) -> bool:
+        return any(
+            _overlaps(box, other) for cell in self._cell_range(box) for other in self._cells.get(cell, ())
+        )
+
+    def insert(self, box: Tuple[int, int, int, int]) -> None:
+        for cell in self._cell_range(box):
+            self._cells.setdefault(cell, []).append(box)
+
+
 def _overlaps(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
     return not (a[2] < b[0] or a[0] > b[2] or a[3] < b[1] or a[1] > b[3])
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import queue
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from moviepy import VideoClip
+from PIL import Image
+
+from geovideo.audio import cached_mixed_audio
+from geovideo.profiling import stage
+from geovideo.schemas import InputConfig, OutputConfig, RenditionConfig
+from geovideo.timeline import frame_times
+
+ENCODERS = ("moviepy", "ffmpeg-pipe")
+
+FrameSource = Callable[[float], np.ndarray]
+
+
+def ffmpeg_exe() -> str:
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+    except ImportError as exc:
+        raise RuntimeError("ffmpeg not found; install it or add it to PATH") from exc
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def x264_args(output: OutputConfig) -> List[str]:
+    args = ["-c:v", "libx264", "-preset", output.preset, "-pix_fmt", "yuv420p", "-crf", str(output.crf)]
+    if output.bitrate:
+        args += ["-b:v", output.bitrate]
+    if output.faststart:
+        args += ["-movflags", "+faststart"]
+    return args
+
+
+class FfmpegPipeEncoder:
+    def __init__(
+        self,
+        path: Path,
+        width: int,
+        height: int,
+        fps: int,
+        output: OutputConfig,
+        audio_path: Optional[Path] = None,
+    ) -> None:
+        self.path = path
+        self.frame_shape = (height, width, 3)
+        command = [
+            ffmpeg_exe(),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(fps),
+            "-i",
+            "-",
+        ]
+        if audio_path:
+            command += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a", "-c:a", "copy"]
+        command += x264_args(output) + [str(path)]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray) -> None:
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match encoder {self.frame_shape}")
+        try:
+            with stage("encode.write"):
+                self._process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except BrokenPipeError:
+            self.close()
+
+    def close(self) -> None:
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        with stage("encode.finish"):
+            stderr = self._process.stderr.read().decode(errors="replace") if self._process.stderr else ""
+            returncode = self._process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.path}: {stderr.strip()}")
+
+    def abort(self) -> None:
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+    def __enter__(self) -> "FfmpegPipeEncoder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def encode_with_moviepy(config: InputConfig, make_frame: FrameSource, verbose: bool) -> None:
+    clip = VideoClip(make_frame, duration=config.timeline.duration)
+    with stage("audio.mix"):
+        audio_path = cached_mixed_audio(config.audio, config.timeline.duration)
+
+    output = Path(config.output.path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    ffmpeg_params = []
+    if config.output.faststart:
+        ffmpeg_params += ["-movflags", "+faststart"]
+    ffmpeg_params += ["-pix_fmt", "yuv420p", "-crf", str(config.output.crf)]
+    codec_params = {"codec": "libx264", "fps": config.style.fps}
+    if audio_path:
+        codec_params["audio_codec"] = "copy"
+    if config.output.bitrate:
+        codec_params["bitrate"] = config.output.bitrate
+    with stage("encode.moviepy"):
+        clip.write_videofile(
+            str(output),
+            **codec_params,
+            preset=config.output.preset,
+            audio=str(audio_path) if audio_path else False,
+            ffmpeg_params=ffmpeg_params,
+            threads=4,
+            logger="bar" if verbose else None,
+        )
+
+
+def rendition_size(rendition: RenditionConfig, width: int, height: int) -> Tuple[int, int]:
+    if rendition.width and rendition.height:
+        return rendition.width, rendition.height
+    if rendition.width:
+        return rendition.width, _even(height * rendition.width / width)
+    if rendition.height:
+        return _even(width * rendition.height / height), rendition.height
+    return width, height
+
+
+def _even(value: float) -> int:
+    return max(int(round(value / 2)) * 2, 2)
+
+
+def fit_frame(frame: np.ndarray, width: int, height: int) -> np.ndarray:
+    src_h, src_w = frame.shape[:2]
+    if (src_w, src_h) == (width, height):
+        return frame
+    scale = max(width / src_w, height / src_h)
+    scaled_w, scaled_h = max(round(src_w * scale), width), max(round(src_h * scale), height)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    scaled = cv2.resize(frame, (scaled_w, scaled_h), interpolation=interpolation)
+    left, top = (scaled_w - width) // 2, (scaled_h - height) // 2
+    return scaled[top : top + height, left : left + width]
+
+
+class EncoderWorker:
+    def __init__(self, encoder: FfmpegPipeEncoder, width: int, height: int, queue_size: int = 8) -> None:
+        self.encoder = encoder
+        self.size = (width, height)
+        self.error: Optional[BaseException] = None
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                self.encoder.write(fit_frame(frame, *self.size))
+            self.encoder.close()
+        except BaseException as exc:  # noqa: BLE001 - re-raised on the submitting thread
+            self.error = exc
+            self.encoder.abort()
+
+    def submit(self, frame: np.ndarray) -> None:
+        while self.error is None:
+            try:
+                self._queue.put(frame, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise self.error
+
+    def finish(self) -> None:
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self) -> None:
+        self.encoder.abort()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join()
+
+
+def _rendition_output(output: OutputConfig, rendition: RenditionConfig) -> OutputConfig:
+    update = {"path": rendition.path, "renditions": []}
+    for field in ("crf", "bitrate", "preset"):
+        value = getattr(rendition, field)
+        if value is not None:
+            update[field] = value
+    return output.model_copy(update=update)
+
+
+def encode_with_ffmpeg_pipe(
+    config: InputConfig,
+    make_frame: FrameSource,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    style = config.style
+    output = config.output
+    times = frame_times(config.timeline.duration, style.fps)
+    videos = [(output, style.width, style.height)]
+    posters: Dict[int, List[Tuple[RenditionConfig, int, int]]] = {}
+    for rendition in output.renditions:
+        width, height = rendition_size(rendition, style.width, style.height)
+        if rendition.format == "mp4":
+            videos.append((_rendition_output(output, rendition), width, height))
+        else:
+            index = min(max(int(round(rendition.poster_time * style.fps)), 0), len(times) - 1)
+            posters.setdefault(index, []).append((rendition, width, height))
+    with stage("audio.mix"):
+        audio_path = cached_mixed_audio(config.audio, config.timeline.duration)
+    workers: List[EncoderWorker] = []
+    try:
+        for video, width, height in videos:
+            path = Path(video.path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            encoder = FfmpegPipeEncoder(path, width, height, style.fps, video, audio_path)
+            workers.append(EncoderWorker(encoder, width, height))
+        for index, t in enumerate(times):
+            frame = make_frame(t)
+            for worker in workers:
+                worker.submit(frame)
+            for rendition, width, height in posters.get(index, []):
+                _write_poster(rendition, fit_frame(frame, width, height))
+            if progress:
+                progress(index + 1, len(times))
+        for worker in workers:
+            worker.finish()
+    except BaseException:
+        for worker in workers:
+            worker.abort()
+        raise
+
+
+def _write_poster(rendition: RenditionConfig, frame: np.ndarray) -> None:
+    path = Path(rendition.path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.fromarray(frame)
+    if rendition.format == "jpeg":
+        image.save(path, format="JPEG", quality=92)
+    else:
+        image.save(path, format="PNG")
+
+
+def resolve_encoder(config: InputConfig, encoder: str) -> str:
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown encoder {encoder}")
+    return "ffmpeg-pipe" if config.output.renditions else encoder
+
+
+def encode_video(
+    config: InputConfig,
+    make_frame: FrameSource,
+    encoder: str,
+    verbose: bool,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    encoder = resolve_encoder(config, encoder)
+    if encoder == "moviepy":
+        encode_with_moviepy(config, make_frame, verbose)
+    else:
+        encode_with_ffmpeg_pipe(config, make_frame, progress)
@@ -4,6 +4,8 @@ import math
 from dataclasses import dataclass
 from typing import Iterable, Tuple
 
+import numpy as np
+
 TILE_SIZE = 256
 
 
@@ -27,7 +29,7 @@ def clamp_lat(lat: float) -> float:
     return max(min(lat, 85.05112878), -85.05112878)
 
 
-def latlon_to_world_px(lat: float, lon: float, zoom: int) -> Tuple[float, float]:
+def latlon_to_world_px(lat: float, lon: float, zoom: float) -> Tuple[float, float]:
     lat = clamp_lat(lat)
     scale = TILE_SIZE * (2**zoom)
     x = (lon + 180.0) / 360.0 * scale
@@ -36,14 +38,39 @@ def latlon_to_world_px(lat: float, lon: float, zoom: int) -> Tuple[float, float]
     return x, y
 
 
+def latlon_to_world_px_array(lats: np.ndarray, lons: np.ndarray, zoom: float) -> Tuple[np.ndarray, np.ndarray]:
+    lats = np.clip(np.asarray(lats, dtype=np.float64), -85.05112878, 85.05112878)
+    lons = np.asarray(lons, dtype=np.float64)
+    scale = TILE_SIZE * (2**zoom)
+    x = (lons + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lats))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
 def world_px_to_tile(x: float, y: float) -> Tuple[int, int]:
     return int(x // TILE_SIZE), int(y // TILE_SIZE)
 
 
+def tile_range_for_view(
+    center_lat: float,
+    center_lon: float,
+    zoom: int,
+    width: int,
+    height: int,
+) -> Tuple[int, int, int, int]:
+    center_x, center_y = latlon_to_world_px(center_lat, center_lon, zoom)
+    top_left_x = center_x - width / 2
+    top_left_y = center_y - height / 2
+    start_tile_x, start_tile_y = world_px_to_tile(top_left_x, top_left_y)
+    end_tile_x, end_tile_y = world_px_to_tile(top_left_x + width, top_left_y + height)
+    return start_tile_x, start_tile_y, end_tile_x, end_tile_y
+
+
 def latlon_to_screen_px(
     lat: float,
     lon: float,
-    zoom: int,
+    zoom: float,
     center_lat: float,
     center_lon: float,
     width: int,
@@ -54,6 +81,20 @@ def latlon_to_screen_px(
     return (px - center_x + width / 2, py - center_y + height / 2)
 
 
+def latlon_to_screen_px_array(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    zoom: float,
+    center_lat: float,
+    center_lon: float,
+    width: int,
+    height: int,
+) -> np.ndarray:
+    center_x, center_y = latlon_to_world_px(center_lat, center_lon, zoom)
+    xs, ys = latlon_to_world_px_array(lats, lons, zoom)
+    return np.stack((xs - center_x + width / 2, ys - center_y + height / 2), axis=-1)
+
+
 def bounds_for_points(points: Iterable[Tuple[float, float]]) -> Bounds:
     lats = [p[0] for p in points]
     lons = [p[1] for p in points]
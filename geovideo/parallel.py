@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.providers import build_provider
+from geovideo.schemas import InputConfig
+from geovideo.timeline import frame_times
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(config_data: dict, camera: CameraState, scale: float = 1.0) -> None:
+    config = InputConfig.model_validate(config_data)
+    _worker["compositor"] = Compositor(config, build_provider(config.provider), scale)
+    _worker["camera"] = camera
+
+
+def _render_in_worker(time_s: float) -> np.ndarray:
+    ctx = FrameContext(time_s=time_s, camera=_worker["camera"])
+    return _worker["compositor"].render_rgb(ctx)
+
+
+class ParallelFrameRenderer:
+    def __init__(
+        self,
+        compositor: Compositor,
+        camera: CameraState,
+        workers: int,
+        window: Optional[int] = None,
+    ) -> None:
+        config = compositor.config
+        self.compositor = compositor
+        self.camera = camera
+        self.fps = config.style.fps
+        self.times = frame_times(config.timeline.duration, config.style.fps)
+        self.window = max(window or workers * 4, 1)
+        self._sources = self._plan_sources()
+        self._unique = sorted(set(self._sources))
+        self.rendered = len(self._unique)
+        self.held = len(self._sources) - self.rendered
+        self._submitted = 0
+        self._pending: Dict[int, Future] = {}
+        self._current: Optional[Tuple[int, np.ndarray]] = None
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config.model_dump(), camera, compositor.scale),
+        )
+
+    def _plan_sources(self) -> List[int]:
+        sources: List[int] = []
+        previous = None
+        for index, time_s in enumerate(self.times):
+            key = self.compositor.frame_key(FrameContext(time_s=time_s, camera=self.camera))
+            sources.append(sources[-1] if sources and key == previous else index)
+            previous = key
+        return sources
+
+    def frame_at(self, time_s: float) -> np.ndarray:
+        index = min(max(int(round(time_s * self.fps)), 0), len(self._sources) - 1)
+        source = self._sources[index]
+        if self._current is not None and self._current[0] == source:
+            return self._current[1]
+        self._fill(source)
+        future = self._pending.pop(source, None)
+        if future is None:
+            frame = self.compositor.render_rgb(FrameContext(time_s=self.times[source], camera=self.camera))
+        else:
+            frame = future.result()
+        for stale in [idx for idx in self._pending if idx < source]:
+            self._pending.pop(stale).cancel()
+        self._current = (source, frame)
+        return frame
+
+    def _fill(self, source: int) -> None:
+        while self._submitted < len(self._unique):
+            index = self._unique[self._submitted]
+            if index > source and len(self._pending) >= self.window:
+                break
+            if index >= source:
+                self._pending[index] = self._executor.submit(_render_in_worker, self.times[index])
+            self._submitted += 1
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ParallelFrameRenderer":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
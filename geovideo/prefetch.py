@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import math
+from typing import Callable, List, Optional, Tuple
+
+from geovideo.basemap import deep_mosaic_extent, overzoom_extent
+from geovideo.camera import CameraState
+from geovideo.geo import tile_range_for_view
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+from geovideo.timeline import camera_zoom_range, compile_timeline
+
+TileKey = Tuple[int, int, int]
+
+
+def plan_zoom_levels(config: InputConfig, camera: CameraState) -> List[int]:
+    timeline = compile_timeline(config.timeline, len(config.pois), config.style.fps, camera.zoom)
+    zooms: List[int] = []
+    for _, zoom in timeline.zoom_boundaries():
+        if zoom not in zooms:
+            zooms.append(zoom)
+    return zooms
+
+
+def plan_views(config: InputConfig, camera: CameraState, scale: float = 1.0) -> List[Tuple[int, int, int]]:
+    style = config.style
+    offset = math.log2(scale)
+    if config.timeline.smooth_zoom:
+        min_zoom, max_zoom = camera_zoom_range(config.timeline, camera.zoom)
+        return [deep_mosaic_extent(min_zoom + offset, max_zoom + offset, style.width, style.height)]
+    return [overzoom_extent(zoom + offset, style.width, style.height) for zoom in plan_zoom_levels(config, camera)]
+
+
+def plan_tiles(config: InputConfig, camera: CameraState, scale: float = 1.0) -> List[TileKey]:
+    tiles: List[TileKey] = []
+    for zoom, width, height in plan_views(config, camera, scale):
+        start_x, start_y, end_x, end_y = tile_range_for_view(
+            camera.center_lat, camera.center_lon, zoom, width, height
+        )
+        for tile_x in range(start_x, end_x + 1):
+            for tile_y in range(start_y, end_y + 1):
+                tiles.append((zoom, tile_x, tile_y))
+    return tiles
+
+
+def prefetch_tiles(
+    provider: TileProvider,
+    tiles: List[TileKey],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    fetched = 0
+    results = provider.fetcher.map(lambda tile: provider.prefetch_tile(*tile), tiles)
+    for done, was_fetched in enumerate(results, start=1):
+        if was_fetched:
+            fetched += 1
+        if progress:
+            progress(done, len(tiles))
+    return fetched
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+import re
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext, FrameHold
+from geovideo.draw import load_font
+from geovideo.profiling import stage
+
+PreviewFrame = Tuple[float, np.ndarray]
+
+_INTERVAL = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*$")
+
+
+def parse_interval(value: str) -> float:
+    match = _INTERVAL.match(value)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid interval {value!r}; use e.g. 0.5s or 500ms")
+    seconds = float(match.group(1))
+    return seconds / 1000 if match.group(2) == "ms" else seconds
+
+
+def parse_times(value: str) -> List[float]:
+    try:
+        return [float(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid time list {value!r}; use e.g. 0,1.5,3") from None
+
+
+def preview_times(duration: float, every: Optional[float] = None, times: Sequence[float] = ()) -> List[float]:
+    selected = list(times)
+    if every:
+        selected += [round(index * every, 6) for index in range(max(int(math.ceil(duration / every - 1e-9)), 1))]
+    return sorted({min(max(t, 0.0), duration) for t in selected})
+
+
+def render_previews(
+    compositor: Compositor,
+    camera: CameraState,
+    times: Sequence[float],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[PreviewFrame]:
+    hold = FrameHold(compositor)
+    frames = []
+    for t in times:
+        with stage("preview.frame"):
+            frames.append((t, hold.render_rgb(FrameContext(time_s=t, camera=camera))))
+        if progress:
+            progress(len(frames), len(times))
+    return frames
+
+
+def frame_path(out: Path, time_s: float, count: int) -> Path:
+    if count == 1:
+        return out
+    return out.with_name(f"{out.stem}-{time_s:07.2f}s{out.suffix or '.png'}")
+
+
+def write_previews(
+    frames: Sequence[PreviewFrame],
+    out: Path,
+    sheet: bool = False,
+    columns: Optional[int] = None,
+    thumb_width: int = 270,
+) -> List[Path]:
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    with stage("preview.write"):
+        if sheet:
+            contact_sheet(frames, columns, thumb_width).save(out)
+            return [Path(out)]
+        paths = []
+        for t, frame in frames:
+            path = frame_path(Path(out), t, len(frames))
+            Image.fromarray(frame).save(path)
+            paths.append(path)
+        return paths
+
+
+def contact_sheet(frames: Sequence[PreviewFrame], columns: Optional[int] = None, thumb_width: int = 270) -> Image.Image:
+    columns = columns or math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    height, width = frames[0][1].shape[:2]
+    thumb_height = round(height * thumb_width / width)
+    gap = 8
+    font = load_font(None, 16)
+    sheet = Image.new("RGB", (columns * (thumb_width + gap) + gap, rows * (thumb_height + gap) + gap), (24, 24, 28))
+    draw = ImageDraw.Draw(sheet, "RGBA")
+    for index, (t, frame) in enumerate(frames):
+        left = gap + (index % columns) * (thumb_width + gap)
+        top = gap + (index // columns) * (thumb_height + gap)
+        thumb = Image.fromarray(frame).resize((thumb_width, thumb_height), Image.Resampling.LANCZOS)
+        sheet.paste(thumb, (left, top))
+        label = f"{t:.2f}s"
+        box = draw.textbbox((left + 6, top + 6), label, font=font)
+        draw.rectangle((box[0] - 4, box[1] - 3, box[2] + 4, box[3] + 3), fill=(0, 0, 0, 170))
+        draw.text((left + 6, top + 6), label, fill=(255, 255, 255), font=font)
+    return sheet
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+Event = Tuple[str, int, int, int]
+
+_NULL = nullcontext()
+_active: Optional["Profiler"] = None
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    name: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        self.profiler.events.append((self.name, self.start, end - self.start, threading.get_ident()))
+
+
+@dataclass
+class Profiler:
+    events: List[Event] = field(default_factory=list)
+    origin_ns: int = field(default_factory=time.perf_counter_ns)
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def summary(self) -> List[StageSummary]:
+        durations: Dict[str, List[int]] = {}
+        for name, _, duration, _ in list(self.events):
+            durations.setdefault(name, []).append(duration)
+        rows = []
+        for name, values in durations.items():
+            ms = np.asarray(values, dtype=np.float64) / 1e6
+            rows.append(
+                StageSummary(
+                    name=name,
+                    count=len(values),
+                    total_ms=float(ms.sum()),
+                    mean_ms=float(ms.mean()),
+                    p95_ms=float(np.percentile(ms, 95)),
+                    max_ms=float(ms.max()),
+                )
+            )
+        return sorted(rows, key=lambda row: row.total_ms, reverse=True)
+
+    def format_summary(self) -> str:
+        lines = [f"{'stage':<28} {'count':>7} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for row in self.summary():
+            lines.append(
+                f"{row.name:<28} {row.count:>7} {row.total_ms:>10.1f} {row.mean_ms:>9.2f} "
+                f"{row.p95_ms:>9.2f} {row.max_ms:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def trace_events(self) -> List[dict]:
+        pid = os.getpid()
+        return [
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - self.origin_ns) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, duration, tid in list(self.events)
+        ]
+
+    def write_trace(self, path: Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "traceEvents": self.trace_events(),
+            "displayTimeUnit": "ms",
+            "otherData": {"summary": [row.__dict__ for row in self.summary()]},
+        }
+        Path(path).write_text(json.dumps(payload), encoding="utf-8")
+
+
+def stage(name: str) -> ContextManager[None]:
+    profiler = _active
+    return _NULL if profiler is None else _Span(profiler, name)
+
+
+@contextmanager
+def profiling(enabled: bool = True) -> Iterator[Optional[Profiler]]:
+    global _active
+    if not enabled:
+        yield None
+        return
+    previous, _active = _active, Profiler()
+    try:
+        yield _active
+    finally:
+        _active = previous
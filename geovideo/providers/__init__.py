@@ -1,20 +1,50 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 from geovideo.providers.base import TileProvider
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.providers.fetch import FetchEngine, throttle_rate
 from geovideo.providers.mapbox import build_mapbox_provider
 from geovideo.providers.osm import build_osm_provider
+from geovideo.providers.pyramid import TilePyramid
+from geovideo.providers.disk_cache import build_tile_store
 from geovideo.schemas import ProviderConfig
 
 
-def build_provider(config: ProviderConfig) -> TileProvider:
+def build_memory_cache(config: ProviderConfig) -> Optional[TileMemoryCache]:
+    if config.memory_cache_bytes <= 0:
+        return None
+    return TileMemoryCache(max_bytes=config.memory_cache_bytes)
+
+
+def build_fetch_engine(config: ProviderConfig) -> FetchEngine:
+    rate = config.rate_limit if config.rate_limit is not None else throttle_rate(config.throttle_s)
+    return FetchEngine(
+        rate=rate,
+        burst=config.burst,
+        workers=config.fetch_workers,
+        max_retries=config.max_retries,
+    )
+
+
+def build_provider(config: ProviderConfig, memory_cache: Optional[TileMemoryCache] = None) -> TileProvider:
+    if memory_cache is None:
+        memory_cache = build_memory_cache(config)
+    store = build_tile_store(config)
+    fetcher = build_fetch_engine(config)
+    pyramid = TilePyramid(config.pyramid_path) if config.pyramid_path else None
     if config.name == "osm":
         return build_osm_provider(
             config.cache_dir,
             config.max_retries,
             config.throttle_s,
             config.user_agent,
+            memory_cache,
+            store,
+            fetcher,
+            pyramid,
         )
     if config.name == "mapbox":
         if not config.api_key:
@@ -25,6 +55,10 @@ def build_provider(config: ProviderConfig) -> TileProvider:
             config.max_retries,
             config.throttle_s,
             config.user_agent,
+            memory_cache,
+            store,
+            fetcher,
+            pyramid,
         )
     if config.name == "custom":
         return TileProvider(
@@ -36,5 +70,9 @@ def build_provider(config: ProviderConfig) -> TileProvider:
             cache_dir=Path(config.cache_dir),
             max_retries=config.max_retries,
             throttle_s=config.throttle_s,
+            memory_cache=memory_cache,
+            store=store,
+            fetcher=fetcher,
+            pyramid=pyramid,
         )
     raise ValueError(f"Unknown provider {config.name}")
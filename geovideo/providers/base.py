@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import io
-import os
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-import requests
+import numpy as np
 from PIL import Image, ImageDraw
 
+from geovideo.profiling import stage
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.providers.fetch import FetchEngine, FetchError, offline_mode, throttle_rate
+from geovideo.providers.pyramid import TilePyramid
+from geovideo.providers.store import DirectoryTileStore, TileStore
+
 
 @dataclass
 class TileProvider:
@@ -21,17 +25,19 @@ class TileProvider:
     cache_dir: Path = Path(".cache/tiles")
     max_retries: int = 3
     throttle_s: float = 0.1
+    memory_cache: Optional[TileMemoryCache] = None
+    store: Optional[TileStore] = None
+    fetcher: Optional[FetchEngine] = None
+    pyramid: Optional[TilePyramid] = None
 
-    def _cache_path(self, z: int, x: int, y: int) -> Path:
-        return self.cache_dir / self.name / str(z) / str(x) / f"{y}.png"
-
-    def _throttle(self) -> None:
-        if self.throttle_s > 0:
-            time.sleep(self.throttle_s)
+    def __post_init__(self) -> None:
+        if self.store is None:
+            self.store = DirectoryTileStore(Path(self.cache_dir) / self.name)
+        if self.fetcher is None:
+            self.fetcher = FetchEngine(rate=throttle_rate(self.throttle_s), max_retries=self.max_retries)
 
     def _offline_mode(self) -> bool:
-        value = os.getenv("GEOVIDEO_OFFLINE", "").strip().lower()
-        return value in {"1", "true", "yes", "on"}
+        return offline_mode()
 
     def _placeholder_tile(self, z: int, x: int, y: int) -> Image.Image:
         image = Image.new("RGB", (256, 256), color=(230, 233, 238))
@@ -46,22 +52,46 @@ class TileProvider:
         return {"User-Agent": "geovideo/0.1 (+https://github.com/congvm/satellite-video-generation)"}
 
     def get_tile(self, z: int, x: int, y: int) -> Image.Image:
-        path = self._cache_path(z, x, y)
-        if path.exists():
-            return Image.open(path).convert("RGB")
+        with stage("tile.get"):
+            if self.memory_cache is None:
+                return self._load_tile(z, x, y)
+            key = (self.name, z, x, y)
+            image = self.memory_cache.get(key)
+            if image is None:
+                image = self._load_tile(z, x, y)
+                self.memory_cache.put(key, image)
+            return image
+
+    def get_tile_array(self, z: int, x: int, y: int) -> np.ndarray:
+        if self.pyramid is not None:
+            pixels = self.pyramid.tile_array(z, x, y)
+            if pixels is not None:
+                return pixels
+        return np.asarray(self.get_tile(z, x, y))
+
+    def _load_tile(self, z: int, x: int, y: int) -> Image.Image:
+        with stage("tile.read"):
+            data = self.store.get(z, x, y)
+        if data is not None:
+            with stage("tile.decode"):
+                return Image.open(io.BytesIO(data)).convert("RGB")
         if self._offline_mode():
             return self._placeholder_tile(z, x, y)
+        return self._fetch_tile(z, x, y)
+
+    def prefetch_tile(self, z: int, x: int, y: int) -> bool:
+        if self._offline_mode() or self.store.contains(z, x, y):
+            return False
+        self._fetch_tile(z, x, y)
+        return True
+
+    def _fetch_tile(self, z: int, x: int, y: int) -> Image.Image:
         url = self.url_template.format(z=z, x=x, y=y, api_key=self.api_key or "")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        last_error: Optional[Exception] = None
-        for _ in range(self.max_retries):
-            try:
-                self._throttle()
-                response = requests.get(url, timeout=10, headers=self._request_headers())
-                response.raise_for_status()
-                image = Image.open(io.BytesIO(response.content)).convert("RGB")
-                image.save(path)
-                return image
-            except Exception as exc:  # noqa: BLE001 - propagate after retries
-                last_error = exc
-        raise RuntimeError(f"Failed to fetch tile {z}/{x}/{y}: {last_error}")
+        try:
+            with stage("tile.fetch"):
+                data = self.fetcher.fetch(url, headers=self._request_headers())
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+        except (FetchError, OSError) as exc:
+            raise RuntimeError(f"Failed to fetch tile {z}/{x}/{y}: {exc}") from exc
+        self.store.put(z, x, y, data)
+        return image
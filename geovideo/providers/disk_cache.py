@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from geovideo.providers.fetch import offline_mode
+from geovideo.providers.store import DirectoryTileStore, MBTilesTileStore, TileKey, TileStore, mbtiles_path
+from geovideo.schemas import ProviderConfig
+
+FLUSH_EVERY = 64
+EVICT_TO = 0.9
+
+
+@dataclass(frozen=True)
+class ZoomStats:
+    zoom: int
+    tiles: int
+    bytes: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass(frozen=True)
+class PruneResult:
+    expired: int = 0
+    evicted: int = 0
+    freed_bytes: int = 0
+
+
+def index_path(cache_dir: str | Path, name: str) -> Path:
+    return Path(cache_dir) / f"{name}.index.sqlite"
+
+
+class TileIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._touched: Dict[TileKey, Tuple[float, int]] = {}
+        self._counters: Dict[int, List[int]] = {}
+        self._pending = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS tiles (
+                        z INTEGER NOT NULL,
+                        x INTEGER NOT NULL,
+                        y INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        PRIMARY KEY (z, x, y)
+                    );
+                    CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access);
+                    CREATE TABLE IF NOT EXISTS counters (
+                        z INTEGER PRIMARY KEY,
+                        hits INTEGER NOT NULL DEFAULT 0,
+                        misses INTEGER NOT NULL DEFAULT 0
+                    );
+                    """
+                )
+            self._conn = conn
+        return self._conn
+
+    def fetched_at(self, z: int, x: int, y: int) -> Optional[float]:
+        with self._lock:
+            row = self._db().execute("SELECT fetched_at FROM tiles WHERE z = ? AND x = ? AND y = ?", (z, x, y)).fetchone()
+        return row[0] if row else None
+
+    def record_hit(self, z: int, x: int, y: int, size: int, now: float) -> None:
+        with self._lock:
+            self._touched[(z, x, y)] = (now, size)
+            self._counters.setdefault(z, [0, 0])[0] += 1
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self._flush_locked()
+
+    def record_miss(self, z: int) -> None:
+        with self._lock:
+            self._counters.setdefault(z, [0, 0])[1] += 1
+
+    def record_fetch(self, z: int, x: int, y: int, size: int, now: float) -> int:
+        with self._lock, self._db() as conn:
+            touched = self._touched.pop((z, x, y), None)
+            row = conn.execute("SELECT size FROM tiles WHERE z = ? AND x = ? AND y = ?", (z, x, y)).fetchone()
+            previous = row[0] if row else touched[1] if touched else 0
+            conn.execute(
+                "INSERT OR REPLACE INTO tiles (z, x, y, size, fetched_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (z, x, y, size, now, now),
+            )
+        return size - previous
+
+    def remove(self, keys: List[TileKey]) -> None:
+        with self._lock, self._db() as conn:
+            for key in keys:
+                self._touched.pop(key, None)
+            conn.executemany("DELETE FROM tiles WHERE z = ? AND x = ? AND y = ?", keys)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def least_recent(self, limit: int) -> List[Tuple[int, int, int, int]]:
+        self.flush()
+        with self._lock:
+            return self._db().execute(
+                "SELECT z, x, y, size FROM tiles ORDER BY last_access LIMIT ?", (limit,)
+            ).fetchall()
+
+    def fetched_before(self, cutoff: float) -> List[Tuple[int, int, int, int]]:
+        with self._lock:
+            return self._db().execute("SELECT z, x, y, size FROM tiles WHERE fetched_at < ?", (cutoff,)).fetchall()
+
+    def keys(self) -> Set[TileKey]:
+        with self._lock:
+            return {tuple(row) for row in self._db().execute("SELECT z, x, y FROM tiles")}
+
+    def stats(self) -> List[ZoomStats]:
+        self.flush()
+        with self._lock:
+            sizes = {
+                z: (count, total)
+                for z, count, total in self._db().execute("SELECT z, COUNT(*), SUM(size) FROM tiles GROUP BY z")
+            }
+            counters = {z: (hits, misses) for z, hits, misses in self._db().execute("SELECT z, hits, misses FROM counters")}
+        return [
+            ZoomStats(z, *sizes.get(z, (0, 0)), *counters.get(z, (0, 0)))
+            for z in sorted(set(sizes) | set(counters))
+        ]
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        touched = [(now, size, now, *key) for key, (now, size) in self._touched.items()]
+        counters = [(z, hits, misses, hits, misses) for z, (hits, misses) in self._counters.items()]
+        self._touched.clear()
+        self._counters.clear()
+        self._pending = 0
+        if not touched and not counters:
+            return
+        with self._db() as conn:
+            conn.executemany(
+                "INSERT INTO tiles (z, x, y, size, fetched_at, last_access) VALUES (?4, ?5, ?6, ?2, ?1, ?3) "
+                "ON CONFLICT (z, x, y) DO UPDATE SET last_access = excluded.last_access",
+                touched,
+            )
+            conn.executemany(
+                "INSERT INTO counters (z, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT (z) DO UPDATE SET hits = hits + ?, misses = misses + ?",
+                counters,
+            )
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ManagedTileStore(TileStore):
+    def __init__(
+        self,
+        store: TileStore,
+        index: TileIndex,
+        max_bytes: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        offline: Callable[[], bool] = offline_mode,
+    ) -> None:
+        self.store = store
+        self.index = index
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.offline = offline
+        self._bytes: Optional[int] = None
+        self._evict_lock = threading.Lock()
+
+    def _expired(self, z: int, x: int, y: int) -> bool:
+        if not self.ttl_s or self.offline():
+            return False
+        fetched_at = self.index.fetched_at(z, x, y)
+        return fetched_at is not None and self.clock() - fetched_at > self.ttl_s
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        data = self.store.get(z, x, y)
+        if data is None or self._expired(z, x, y):
+            self.index.record_miss(z)
+            return None
+        self.index.record_hit(z, x, y, len(data), self.clock())
+        return data
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        self.store.put(z, x, y, data)
+        delta = self.index.record_fetch(z, x, y, len(data), self.clock())
+        with self._evict_lock:
+            self._bytes = self.index.total_bytes() if self._bytes is None else self._bytes + delta
+            over_budget = self.max_bytes is not None and self._bytes > self.max_bytes
+        if over_budget:
+            self.prune()
+
+    def contains(self, z: int, x: int, y: int) -> bool:
+        return self.store.contains(z, x, y) and not self._expired(z, x, y)
+
+    def delete(self, z: int, x: int, y: int) -> None:
+        self.store.delete(z, x, y)
+        self.index.remove([(z, x, y)])
+
+    def iter_tiles(self) -> Iterator[TileKey]:
+        return self.store.iter_tiles()
+
+    def sync(self) -> int:
+        known = self.index.keys()
+        added = 0
+        now = self.clock()
+        for z, x, y in self.store.iter_tiles():
+            if (z, x, y) in known:
+                continue
+            data = self.store.get(z, x, y)
+            if data is not None:
+                self.index.record_fetch(z, x, y, len(data), now)
+                added += 1
+        self._bytes = self.index.total_bytes()
+        return added
+
+    def prune(self, max_bytes: Optional[int] = None, ttl_s: Optional[float] = None) -> PruneResult:
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        with self._evict_lock:
+            freed = 0
+            expired = self.index.fetched_before(self.clock() - ttl_s) if ttl_s else []
+            self._remove(expired)
+            freed += sum(row[3] for row in expired)
+            evicted = 0
+            self._bytes = self.index.total_bytes()
+            if max_bytes is not None and self._bytes > max_bytes:
+                target = int(max_bytes * EVICT_TO)
+                while self._bytes > target:
+                    batch = []
+                    for row in self.index.least_recent(256):
+                        if self._bytes <= target:
+                            break
+                        batch.append(row)
+                        self._bytes -= row[3]
+                    if not batch:
+                        break
+                    self._remove(batch)
+                    evicted += len(batch)
+                    freed += sum(row[3] for row in batch)
+            return PruneResult(expired=len(expired), evicted=evicted, freed_bytes=freed)
+
+    def _remove(self, rows: List[Tuple[int, int, int, int]]) -> None:
+        for z, x, y, _ in rows:
+            self.store.delete(z, x, y)
+        self.index.remove([(z, x, y) for z, x, y, _ in rows])
+
+    def stats(self) -> List[ZoomStats]:
+        return self.index.stats()
+
+    def close(self) -> None:
+        self.index.close()
+        self.store.close()
+
+
+def open_tile_store(
+    cache_dir: str | Path,
+    name: str,
+    backend: str = "directory",
+    archive: Optional[str | Path] = None,
+    max_bytes: Optional[int] = None,
+    ttl_s: Optional[float] = None,
+) -> ManagedTileStore:
+    if backend == "mbtiles":
+        store: TileStore = MBTilesTileStore(Path(archive) if archive else mbtiles_path(cache_dir, name), name=name)
+    else:
+        store = DirectoryTileStore(Path(cache_dir) / name)
+    return ManagedTileStore(store, TileIndex(index_path(cache_dir, name)), max_bytes=max_bytes, ttl_s=ttl_s)
+
+
+def build_tile_store(config: ProviderConfig) -> ManagedTileStore:
+    return open_tile_store(
+        config.cache_dir,
+        config.name,
+        config.cache_backend,
+        config.mbtiles_path,
+        max_bytes=config.cache_max_bytes,
+        ttl_s=config.cache_ttl_s,
+    )
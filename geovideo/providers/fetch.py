@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER_S = 120.0
+
+
+class FetchError(RuntimeError):
+    pass
+
+
+def offline_mode() -> bool:
+    return os.getenv("GEOVIDEO_OFFLINE", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def throttle_rate(throttle_s: float) -> float:
+    return 1.0 / throttle_s if throttle_s > 0 else 0.0
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    burst: int = 1
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    _tokens: float = field(default=0.0, repr=False)
+    _updated: Optional[float] = field(default=None, repr=False)
+    _blocked_until: float = field(default=0.0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                if self._updated is None:
+                    self._tokens = float(self.burst)
+                    self._updated = now
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_s = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            self.sleep(wait_s)
+
+    def defer(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class FetchEngine:
+    rate: float = 10.0
+    burst: int = 4
+    workers: int = 8
+    max_retries: int = 3
+    backoff_s: float = 0.5
+    max_backoff_s: float = 30.0
+    timeout_s: float = 10.0
+    sleep: Callable[[float], None] = time.sleep
+    requests_sent: int = 0
+    retries: int = 0
+    _bucket: TokenBucket = field(init=False, repr=False)
+    _session: requests.Session = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        self._bucket = TokenBucket(self.rate, max(self.burst, 1), sleep=self.sleep)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self.workers, 1))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+        last_error: Optional[Exception] = None
+        for attempt in range(max(self.max_retries, 1)):
+            if attempt:
+                with self._lock:
+                    self.retries += 1
+            self._bucket.acquire()
+            with self._lock:
+                self.requests_sent += 1
+            delay = self._backoff(attempt)
+            try:
+                response = self._session.get(url, headers=headers, timeout=self.timeout_s)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_error = exc
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError as exc:
+                        raise FetchError(f"{url}: {exc}") from exc
+                    return response.content
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None:
+                    delay = min(retry_after, MAX_RETRY_AFTER_S)
+                    self._bucket.defer(delay)
+            if attempt + 1 < self.max_retries:
+                self.sleep(delay)
+        raise FetchError(f"{url}: {last_error}")
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_s * (2**attempt), self.max_backoff_s)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        if self.workers <= 1:
+            for item in items:
+                yield fn(item)
+            return
+        pending: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="geovideo-fetch") as pool:
+            for item in items:
+                pending.add(pool.submit(fn, item))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def close(self) -> None:
+        self._session.close()
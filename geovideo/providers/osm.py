@@ -3,6 +3,10 @@ from __future__ import annotations
 from pathlib import Path
 
 from geovideo.providers.base import TileProvider
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.providers.fetch import FetchEngine
+from geovideo.providers.pyramid import TilePyramid
+from geovideo.providers.store import TileStore
 
 
 def build_osm_provider(
@@ -10,6 +14,10 @@ def build_osm_provider(
     max_retries: int,
     throttle_s: float,
     user_agent: str | None = None,
+    memory_cache: TileMemoryCache | None = None,
+    store: TileStore | None = None,
+    fetcher: FetchEngine | None = None,
+    pyramid: TilePyramid | None = None,
 ) -> TileProvider:
     return TileProvider(
         name="osm",
@@ -19,4 +27,8 @@ def build_osm_provider(
         cache_dir=Path(cache_dir),
         max_retries=max_retries,
         throttle_s=throttle_s,
+        memory_cache=memory_cache,
+        store=store,
+        fetcher=fetcher,
+        pyramid=pyramid,
     )
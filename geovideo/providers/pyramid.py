@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from PIL import Image
+
+from geovideo.geo import TILE_SIZE
+from geovideo.providers.store import TileKey, TileStore
+
+
+def pyramid_path(cache_dir: str | Path, name: str) -> Path:
+    return Path(cache_dir) / f"{name}.pyramid.npy"
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def _key(z: int, x: int, y: int) -> str:
+    return f"{z}/{x}/{y}"
+
+
+class TilePyramid:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        index = json.loads(_index_path(self.path).read_text(encoding="utf-8"))
+        self.slots: Dict[str, int] = index["tiles"]
+        self.tiles = np.load(self.path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, key: TileKey) -> bool:
+        return _key(*key) in self.slots
+
+    def tile_array(self, z: int, x: int, y: int) -> Optional[np.ndarray]:
+        slot = self.slots.get(_key(z, x, y))
+        return None if slot is None else self.tiles[slot]
+
+
+def build_pyramid(
+    store: TileStore,
+    path: str | Path,
+    tiles: Optional[Iterable[TileKey]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    path = Path(path)
+    keys = sorted(set(store.iter_tiles() if tiles is None else tiles))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp.npy")
+    array = open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=(max(len(keys), 1), TILE_SIZE, TILE_SIZE, 3))
+    slots: Dict[str, int] = {}
+    for done, (z, x, y) in enumerate(keys, start=1):
+        data = store.get(z, x, y)
+        if data is not None:
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            if image.size == (TILE_SIZE, TILE_SIZE):
+                slot = len(slots)
+                array[slot] = np.asarray(image)
+                slots[_key(z, x, y)] = slot
+        if progress:
+            progress(done, len(keys))
+    array.flush()
+    del array
+    tmp_index = _index_path(tmp_path)
+    tmp_index.write_text(json.dumps({"tile_size": TILE_SIZE, "tiles": slots}), encoding="utf-8")
+    os.replace(tmp_path, path)
+    os.replace(tmp_index, _index_path(path))
+    return len(slots)
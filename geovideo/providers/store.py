@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+TileKey = Tuple[int, int, int]
+
+
+class TileStore(ABC):
+    @abstractmethod
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def put(self, z: int, x: int, y: int, data: bytes) -> None: ...
+
+    @abstractmethod
+    def contains(self, z: int, x: int, y: int) -> bool: ...
+
+    @abstractmethod
+    def delete(self, z: int, x: int, y: int) -> None: ...
+
+    @abstractmethod
+    def iter_tiles(self) -> Iterator[TileKey]: ...
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryTileStore(TileStore):
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path(self, z: int, x: int, y: int) -> Path:
+        return self.root / str(z) / str(x) / f"{y}.png"
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        try:
+            return self.path(z, x, y).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        path = self.path(z, x, y)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def contains(self, z: int, x: int, y: int) -> bool:
+        return self.path(z, x, y).exists()
+
+    def delete(self, z: int, x: int, y: int) -> None:
+        self.path(z, x, y).unlink(missing_ok=True)
+
+    def iter_tiles(self) -> Iterator[TileKey]:
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.glob("*/*/*.png")):
+            try:
+                yield int(path.parent.parent.name), int(path.parent.name), int(path.stem)
+            except ValueError:
+                continue
+
+
+class MBTilesTileStore(TileStore):
+    def __init__(self, path: Path, name: str = "geovideo") -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS images (tile_id TEXT PRIMARY KEY, tile_data BLOB NOT NULL);
+                CREATE TABLE IF NOT EXISTS map (
+                    zoom_level INTEGER NOT NULL,
+                    tile_column INTEGER NOT NULL,
+                    tile_row INTEGER NOT NULL,
+                    tile_id TEXT NOT NULL,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+                CREATE INDEX IF NOT EXISTS map_tile_id ON map (tile_id);
+                CREATE VIEW IF NOT EXISTS tiles AS
+                    SELECT map.zoom_level AS zoom_level, map.tile_column AS tile_column,
+                           map.tile_row AS tile_row, images.tile_data AS tile_data
+                    FROM map JOIN images ON images.tile_id = map.tile_id;
+                """
+            )
+            self._conn.execute("INSERT OR IGNORE INTO metadata (name, value) VALUES ('name', ?)", (name,))
+            self._conn.execute("INSERT OR IGNORE INTO metadata (name, value) VALUES ('format', 'png')")
+
+    @staticmethod
+    def _row(z: int, y: int) -> int:
+        return (1 << z) - 1 - y
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT images.tile_data FROM map JOIN images ON images.tile_id = map.tile_id "
+                "WHERE map.zoom_level = ? AND map.tile_column = ? AND map.tile_row = ?",
+                (z, x, self._row(z, y)),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        tile_id = hashlib.sha256(data).hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)", (tile_id, sqlite3.Binary(data))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, tile_id) VALUES (?, ?, ?, ?)",
+                (z, x, self._row(z, y), tile_id),
+            )
+
+    def contains(self, z: int, x: int, y: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM map WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, self._row(z, y)),
+            ).fetchone()
+        return row is not None
+
+    def delete(self, z: int, x: int, y: int) -> None:
+        key = (z, x, self._row(z, y))
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT tile_id FROM map WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", key
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM map WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", key)
+            self._conn.execute(
+                "DELETE FROM images WHERE tile_id = ? AND NOT EXISTS (SELECT 1 FROM map WHERE tile_id = ?)",
+                (row[0], row[0]),
+            )
+
+    def iter_tiles(self) -> Iterator[TileKey]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT zoom_level, tile_column, tile_row FROM map ORDER BY zoom_level, tile_column, tile_row"
+            ).fetchall()
+        for z, x, row in rows:
+            yield z, x, self._row(z, row)
+
+    def unique_images(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def mbtiles_path(cache_dir: str | Path, name: str) -> Path:
+    return Path(cache_dir) / f"{name}.mbtiles"
+
+
+def copy_tiles(
+    source: TileStore,
+    target: TileStore,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    copied = 0
+    for z, x, y in source.iter_tiles():
+        data = source.get(z, x, y)
+        if data is None:
+            continue
+        target.put(z, x, y, data)
+        copied += 1
+        if progress:
+            progress(copied)
+    return copied
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from geovideo.camera import CameraState, auto_camera
+from geovideo.compositor import Compositor, FrameContext, FrameHold
+from geovideo.draft import draft_config
+from geovideo.encoders import encode_video, resolve_encoder
+from geovideo.parallel import ParallelFrameRenderer
+from geovideo.prefetch import plan_tiles, prefetch_tiles
+from geovideo.profiling import stage
+from geovideo.providers import build_provider
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+from geovideo.segments import render_fingerprint, render_segments
+
+Log = Callable[[str], None]
+
+
+@dataclass
+class RenderStats:
+    frames_rendered: int = 0
+    frames_held: int = 0
+    tiles_planned: int = 0
+    tiles_fetched: int = 0
+    segments_rendered: int = 0
+    segments_skipped: int = 0
+    segments_joined: bool = False
+
+
+def load_config(path: Path) -> InputConfig:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return InputConfig.model_validate(data)
+
+
+def build_camera(config: InputConfig, fit: str) -> CameraState:
+    points = [(poi.lat, poi.lon) for poi in config.pois]
+    if fit == "center":
+        zoom_override = config.timeline.camera_start_zoom or config.timeline.camera_end_zoom
+        return auto_camera(
+            (config.center.lat, config.center.lon),
+            points,
+            config.style.width,
+            config.style.height,
+            config.style.margin_ratio,
+            zoom_override=zoom_override,
+        )
+    return auto_camera(
+        (config.center.lat, config.center.lon),
+        points,
+        config.style.width,
+        config.style.height,
+        config.style.margin_ratio,
+    )
+
+
+def prefetch_for_render(
+    config: InputConfig,
+    provider: TileProvider,
+    camera: CameraState,
+    log: Optional[Log] = None,
+    scale: float = 1.0,
+) -> RenderStats:
+    tiles = plan_tiles(config, camera, scale)
+    if log:
+        log(f"Prefetching {len(tiles)} tiles...")
+    fetched = prefetch_tiles(provider, tiles)
+    if log:
+        log(f"Fetched {fetched} of {len(tiles)} tiles.")
+    return RenderStats(tiles_planned=len(tiles), tiles_fetched=fetched)
+
+
+def render_video(
+    config: InputConfig,
+    *,
+    seed: Optional[int] = None,
+    fit: str = "all",
+    workers: int = 1,
+    encoder: str = "moviepy",
+    provider: Optional[TileProvider] = None,
+    verbose: bool = False,
+    log: Optional[Log] = None,
+    draft_scale: Optional[float] = None,
+    segments: Optional[int] = None,
+    segment: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    compositor: Optional[Compositor] = None,
+    camera: Optional[CameraState] = None,
+) -> RenderStats:
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    provider = provider or (compositor.provider if compositor else build_provider(config.provider))
+    camera = camera or build_camera(config, fit)
+    scale = 1.0
+    if draft_scale is not None:
+        config, scale = draft_config(config, draft_scale), draft_scale
+        if log:
+            log(f"Draft render at {config.style.width}x{config.style.height}, {config.style.fps} fps.")
+    with stage("render.prefetch"):
+        stats = prefetch_for_render(config, provider, camera, log, scale)
+    compositor = compositor or Compositor(config, provider, scale)
+    if workers > 1:
+        renderer: FrameHold | ParallelFrameRenderer = ParallelFrameRenderer(compositor, camera, workers)
+        frame_at = renderer.frame_at
+    else:
+        renderer = hold = FrameHold(compositor)
+
+        def frame_at(t: float) -> np.ndarray:
+            return hold.render_rgb(FrameContext(time_s=t, camera=camera))
+
+    def make_frame(t: float) -> np.ndarray:
+        with stage("render.frame"):
+            return frame_at(t)
+
+    try:
+        if segments:
+            fingerprint = render_fingerprint(config, segments, fit=fit, draft_scale=draft_scale)
+            result = render_segments(config, make_frame, segments, fingerprint, only=segment, log=log)
+            stats.segments_rendered = len(result.rendered)
+            stats.segments_skipped = len(result.skipped)
+            stats.segments_joined = result.complete
+        else:
+            if log:
+                log(f"Rendering video frames with {resolve_encoder(config, encoder)}...")
+            encode_video(config, make_frame, encoder, verbose, progress)
+    finally:
+        if isinstance(renderer, ParallelFrameRenderer):
+            renderer.close()
+    stats.frames_rendered = renderer.rendered
+    stats.frames_held = renderer.held
+    if log:
+        log(f"Rendered {renderer.rendered} frames, held {renderer.held} identical frames.")
+        cache = provider.memory_cache
+        if cache is not None:
+            log(
+                f"Tile memory cache: {cache.hits} hits, {cache.misses} misses, "
+                f"{cache.evictions} evictions, {cache.size_bytes / 1e6:.1f} MB"
+            )
+    return stats
@@ -41,6 +41,7 @@ class StyleConfig(BaseModel):
     subtitle: Optional[str] = None
     show_connectors: bool = True
     show_polygon: bool = False
+    show_rings: bool = True
     polygon_points: Optional[list[Location]] = None
     overlay_path: Optional[str] = None
     watermark_text: str = "© OpenStreetMap contributors"
@@ -55,6 +56,26 @@ class TimelineConfig(BaseModel):
     ease: Literal["linear", "ease_in_out"] = "ease_in_out"
     camera_start_zoom: Optional[int] = None
     camera_end_zoom: Optional[int] = None
+    smooth_zoom: bool = False
+
+
+class RenditionConfig(BaseModel):
+    path: str
+    format: Literal["mp4", "jpeg", "png"] = "mp4"
+    width: Optional[int] = Field(default=None, gt=0)
+    height: Optional[int] = Field(default=None, gt=0)
+    crf: Optional[int] = None
+    bitrate: Optional[str] = None
+    preset: Optional[str] = None
+    poster_time: float = 0.0
+
+    @model_validator(mode="after")
+    def _validate_size(self) -> "RenditionConfig":
+        if self.format == "mp4":
+            for value in (self.width, self.height):
+                if value is not None and value % 2:
+                    raise ValueError("mp4 rendition width and height must be even")
+        return self
 
 
 class OutputConfig(BaseModel):
@@ -63,6 +84,7 @@ class OutputConfig(BaseModel):
     bitrate: Optional[str] = None
     preset: str = "medium"
     faststart: bool = True
+    renditions: list[RenditionConfig] = Field(default_factory=list)
 
 
 class AudioConfig(BaseModel):
@@ -73,6 +95,7 @@ class AudioConfig(BaseModel):
     ducking_ratio: float = 0.35
     fade_in: float = 0.4
     fade_out: float = 0.6
+    cache_dir: str = ".cache/audio"
 
 
 class ProviderConfig(BaseModel):
@@ -83,6 +106,15 @@ class ProviderConfig(BaseModel):
     cache_dir: str = ".cache/tiles"
     max_retries: int = 3
     throttle_s: float = 0.1
+    rate_limit: Optional[float] = Field(default=None, ge=0)
+    burst: int = Field(default=4, ge=1)
+    fetch_workers: int = Field(default=8, ge=1)
+    memory_cache_bytes: int = Field(default=256 * 1024 * 1024, ge=0)
+    cache_backend: Literal["directory", "mbtiles"] = "directory"
+    mbtiles_path: Optional[str] = None
+    cache_max_bytes: Optional[int] = Field(default=None, ge=0)
+    cache_ttl_s: Optional[float] = Field(default=None, gt=0)
+    pyramid_path: Optional[str] = None
 
     @model_validator(mode="after")
     def _validate_provider(self) -> "ProviderConfig":
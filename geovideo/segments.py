@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from geovideo.audio import cached_mixed_audio
+from geovideo.encoders import FfmpegPipeEncoder, FrameSource, ffmpeg_exe
+from geovideo.profiling import stage
+from geovideo.schemas import InputConfig
+from geovideo.timeline import frame_times
+
+MANIFEST_NAME = "manifest.json"
+LOCK_TIMEOUT_S = 60.0
+
+Log = Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class Segment:
+    index: int
+    count: int
+    start: int
+    end: int
+
+    @property
+    def frames(self) -> int:
+        return self.end - self.start
+
+    @property
+    def name(self) -> str:
+        return f"segment-{self.index + 1:04d}-of-{self.count:04d}.mp4"
+
+
+@dataclass
+class SegmentResult:
+    rendered: List[int] = field(default_factory=list)
+    skipped: List[int] = field(default_factory=list)
+    complete: bool = False
+    output: Optional[Path] = None
+
+
+def parse_segment(value: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid segment {value!r}; use i/N, e.g. 2/8") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid segment {value!r}; i must be between 1 and N")
+    return index - 1, count
+
+
+def plan_segments(frames: int, count: int) -> List[Segment]:
+    if count > frames:
+        raise ValueError(f"Cannot split {frames} frames into {count} segments")
+    return [Segment(index, count, index * frames // count, (index + 1) * frames // count) for index in range(count)]
+
+
+def segments_dir(output_path: str | Path) -> Path:
+    output = Path(output_path)
+    return output.with_name(f"{output.stem}.segments")
+
+
+def render_fingerprint(config: InputConfig, count: int, **params: object) -> str:
+    data = config.model_dump(mode="json", exclude={"output": {"path", "renditions"}})
+    payload = json.dumps({"config": data, "count": count, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _locked(path: Path, timeout_s: float = LOCK_TIMEOUT_S) -> Iterator[None]:
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}") from None
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        path.unlink(missing_ok=True)
+
+
+class SegmentManifest:
+    def __init__(self, directory: Path, fingerprint: str, segments: List[Segment]) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_NAME
+        self.fingerprint = fingerprint
+        self.segments = segments
+
+    def _read(self) -> Dict[str, dict]:
+        if not self.path.exists():
+            return {}
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if data.get("fingerprint") != self.fingerprint:
+            return {}
+        return data.get("segments", {})
+
+    def completed(self) -> Dict[int, dict]:
+        bounds = {segment.index: (segment.start, segment.frames) for segment in self.segments}
+        done = {}
+        for key, entry in self._read().items():
+            path = self.directory / entry["path"]
+            if bounds.get(int(key)) != (entry.get("start_frame"), entry.get("frames")):
+                continue
+            if path.exists() and path.stat().st_size == entry["bytes"]:
+                done[int(key)] = entry
+        return done
+
+    def mark_done(self, segment: Segment, path: Path, seconds: float) -> None:
+        entry = {
+            "path": path.name,
+            "start_frame": segment.start,
+            "frames": segment.frames,
+            "bytes": path.stat().st_size,
+            "seconds": round(seconds, 3),
+        }
+        with _locked(self.path.with_suffix(".lock")):
+            segments = self._read()
+            segments[str(segment.index)] = entry
+            payload = {
+                "fingerprint": self.fingerprint,
+                "count": len(self.segments),
+                "frames": sum(item.frames for item in self.segments),
+                "segments": dict(sorted(segments.items(), key=lambda item: int(item[0]))),
+            }
+            tmp_path = self.path.with_name(f".{MANIFEST_NAME}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+def encode_segment(config: InputConfig, make_frame: FrameSource, segment: Segment, path: Path) -> None:
+    style = config.style
+    times = frame_times(config.timeline.duration, style.fps)[segment.start : segment.end]
+    output = config.output.model_copy(update={"faststart": False})
+    tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    with FfmpegPipeEncoder(tmp_path, style.width, style.height, style.fps, output) as encoder:
+        for t in times:
+            encoder.write(make_frame(t))
+    os.replace(tmp_path, path)
+
+
+def concat_segments(config: InputConfig, paths: List[Path], output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="geovideo-") as tmp:
+        listing = Path(tmp) / "segments.txt"
+        listing.write_text("".join(f"file '{path.resolve().as_posix()}'\n" for path in paths), encoding="utf-8")
+        with stage("audio.mix"):
+            audio_path = cached_mixed_audio(config.audio, config.timeline.duration)
+        tmp_output = output_path.with_name(f".{output_path.stem}.{os.getpid()}.tmp{output_path.suffix}")
+        command = [ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(listing)]
+        if audio_path:
+            command += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a", "-c:a", "copy"]
+        command += ["-c:v", "copy"]
+        if config.output.faststart:
+            command += ["-movflags", "+faststart"]
+        command.append(str(tmp_output))
+        with stage("segment.concat"):
+            result = subprocess.run(command, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            tmp_output.unlink(missing_ok=True)
+            stderr = result.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed joining segments into {output_path}: {stderr}")
+        os.replace(tmp_output, output_path)
+
+
+def render_segments(
+    config: InputConfig,
+    make_frame: FrameSource,
+    count: int,
+    fingerprint: str,
+    only: Optional[int] = None,
+    log: Optional[Log] = None,
+) -> SegmentResult:
+    segments = plan_segments(len(frame_times(config.timeline.duration, config.style.fps)), count)
+    directory = segments_dir(config.output.path)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = SegmentManifest(directory, fingerprint, segments)
+    done = manifest.completed()
+    result = SegmentResult()
+    for segment in segments if only is None else [segments[only]]:
+        if segment.index in done:
+            result.skipped.append(segment.index)
+            if log:
+                log(f"Segment {segment.index + 1}/{count} already rendered, skipping.")
+            continue
+        if log:
+            log(f"Rendering segment {segment.index + 1}/{count} (frames {segment.start}-{segment.end - 1})...")
+        started = time.perf_counter()
+        path = directory / segment.name
+        with stage("segment.encode"):
+            encode_segment(config, make_frame, segment, path)
+        manifest.mark_done(segment, path, time.perf_counter() - started)
+        result.rendered.append(segment.index)
+    done = manifest.completed()
+    if len(done) == len(segments):
+        output = Path(config.output.path)
+        if log:
+            log(f"Joining {len(segments)} segments into {output}...")
+        concat_segments(config, [directory / done[segment.index]["path"] for segment in segments], output)
+        result.complete = True
+        result.output = output
+    elif log:
+        log(f"{len(done)} of {len(segments)} segments rendered.")
+    return result
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError
+
+from geovideo.batch import SharedProviders
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor
+from geovideo.draft import draft_config
+from geovideo.encoders import ENCODERS
+from geovideo.preview import parse_interval, preview_times, render_previews, write_previews
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.render import build_camera, render_video
+from geovideo.schemas import InputConfig
+
+MAX_COMPOSITORS = 8
+MAX_FINISHED_JOBS = 500
+
+Log = Callable[[str], None]
+CompositorEntry = Tuple[Compositor, CameraState, threading.Lock]
+
+
+class JobRequest(BaseModel):
+    kind: Literal["render", "preview"]
+    config: InputConfig
+    out: Optional[str] = None
+    fit: Literal["all", "center"] = "all"
+    wait: bool = False
+    times: List[float] = Field(default_factory=list)
+    every: Optional[str] = None
+    sheet: bool = False
+    columns: Optional[int] = Field(default=None, ge=1)
+    thumb_width: int = Field(default=270, ge=16)
+    encoder: str = "ffmpeg-pipe"
+    draft_scale: Optional[float] = Field(default=None, gt=0, le=1)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"
+    progress: float = 0.0
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> dict:
+        return {item.name: getattr(self, item.name) for item in fields(self) if item.name != "done"}
+
+
+class RenderService:
+    def __init__(
+        self,
+        out_dir: Path,
+        jobs: int = 2,
+        memory_cache_bytes: int = 512 * 1024 * 1024,
+        log: Optional[Log] = None,
+        cache_dir: Path = Path(".cache"),
+        assets_dir: Optional[Path] = None,
+    ) -> None:
+        self.out_dir = Path(out_dir)
+        self.cache_dir = Path(cache_dir)
+        self.assets_dir = Path(assets_dir) if assets_dir else None
+        self.jobs = max(jobs, 1)
+        self.log = log
+        self.providers = SharedProviders(TileMemoryCache(memory_cache_bytes) if memory_cache_bytes > 0 else None)
+        self._executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="geovideo-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._compositors: "OrderedDict[Tuple[str, str, Optional[float]], CompositorEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, request: JobRequest) -> Job:
+        if request.kind == "preview" and request.every:
+            parse_interval(request.every)
+        if request.encoder not in ENCODERS:
+            raise ValueError(f"encoder must be one of: {', '.join(ENCODERS)}")
+        if request.out:
+            self.output_path(request.out)
+        request = request.model_copy(update={"config": self.confine(request.config)})
+        job = Job(id=uuid.uuid4().hex[:12], kind=request.kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_jobs()
+        self._executor.submit(self._run, job, request)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def health(self) -> dict:
+        jobs = self.list()
+        cache = self.providers.memory_cache
+        return {
+            "status": "ok",
+            "concurrency": self.jobs,
+            "queued": sum(1 for job in jobs if job.status == "queued"),
+            "running": sum(1 for job in jobs if job.status == "running"),
+            "compositors": len(self._compositors),
+            "tile_cache": None
+            if cache is None
+            else {"hits": cache.hits, "misses": cache.misses, "bytes": cache.size_bytes},
+        }
+
+    def output_path(self, out: str) -> Path:
+        return _inside(self.out_dir, out, "out", "the output directory")
+
+    def asset_path(self, value: str, name: str) -> str:
+        if self.assets_dir is None:
+            raise ValueError(f"{name} is not accepted; start the server with --assets-dir to allow input files")
+        return str(_inside(self.assets_dir, value, name, "the assets directory"))
+
+    def confine(self, config: InputConfig) -> InputConfig:
+        config = config.model_copy(deep=True)
+        style, audio, provider = config.style, config.audio, config.provider
+        for model, name, label in (
+            (provider, "cache_dir", "provider.cache_dir"),
+            (provider, "mbtiles_path", "provider.mbtiles_path"),
+            (provider, "pyramid_path", "provider.pyramid_path"),
+            (audio, "cache_dir", "audio.cache_dir"),
+        ):
+            if name in model.model_fields_set:
+                raise ValueError(f"{label} is managed by the server and cannot be set per job")
+        provider.cache_dir = str(self.cache_dir / "tiles")
+        audio.cache_dir = str(self.cache_dir / "audio")
+        for model, name, label in (
+            (style, "font_path", "style.font_path"),
+            (style, "overlay_path", "style.overlay_path"),
+            (audio, "music_path", "audio.music_path"),
+            (audio, "voiceover_path", "audio.voiceover_path"),
+        ):
+            value = getattr(model, name)
+            if value:
+                setattr(model, name, self.asset_path(value, label))
+        for rendition in config.output.renditions:
+            rendition.path = str(_inside(self.out_dir, rendition.path, "rendition path", "the output directory"))
+        return config
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _trim_jobs(self) -> None:
+        finished = [job.id for job in self._jobs.values() if job.done.is_set()]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, request: JobRequest) -> None:
+        job.status = "running"
+        job.started = time.time()
+
+        def progress(done: int, total: int) -> None:
+            job.progress = round(done / max(total, 1), 4)
+
+        try:
+            if request.kind == "preview":
+                job.outputs = [str(path) for path in self._preview(job, request, progress)]
+            else:
+                job.outputs = [self._render(job, request, progress)]
+            job.status = "done"
+            job.progress = 1.0
+        except Exception as exc:  # noqa: BLE001 - reported through the job status
+            job.status = "failed"
+            job.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        finally:
+            job.finished = time.time()
+            job.done.set()
+            if self.log:
+                self.log(f"[{job.status}] {job.kind} {job.id} ({job.finished - job.started:.2f}s)")
+
+    def _compositor(self, config: InputConfig, fit: str, draft_scale: Optional[float] = None) -> CompositorEntry:
+        key = (config.model_dump_json(exclude={"output", "audio"}), fit, draft_scale)
+        with self._lock:
+            entry = self._compositors.get(key)
+            if entry is not None:
+                self._compositors.move_to_end(key)
+                return entry
+        provider = self.providers.get(config.provider)
+        if draft_scale is None:
+            compositor = Compositor(config, provider)
+        else:
+            compositor = Compositor(draft_config(config, draft_scale), provider, draft_scale)
+        entry = (compositor, build_camera(config, fit), threading.Lock())
+        with self._lock:
+            entry = self._compositors.setdefault(key, entry)
+            while len(self._compositors) > MAX_COMPOSITORS:
+                self._compositors.popitem(last=False)
+        return entry
+
+    def _preview(self, job: Job, request: JobRequest, progress: Callable[[int, int], None]) -> List[Path]:
+        config = request.config
+        interval = parse_interval(request.every) if request.every else None
+        times = preview_times(config.timeline.duration, interval, request.times or ([] if interval else [3.2]))
+        compositor, camera, lock = self._compositor(config, request.fit)
+        with lock:
+            frames = render_previews(compositor, camera, times, progress)
+        out = self.output_path(request.out or f"{job.id}.png")
+        return write_previews(frames, out, request.sheet, request.columns, request.thumb_width)
+
+    def _render(self, job: Job, request: JobRequest, progress: Callable[[int, int], None]) -> str:
+        config = request.config.model_copy(deep=True)
+        suffix = Path(config.output.path).suffix or ".mp4"
+        config.output.path = str(self.output_path(request.out or f"{job.id}{suffix}"))
+        compositor, camera, lock = self._compositor(config, request.fit, request.draft_scale)
+        with lock:
+            render_video(
+                config,
+                fit=request.fit,
+                encoder=request.encoder,
+                draft_scale=request.draft_scale,
+                progress=progress,
+                compositor=compositor,
+                camera=camera,
+            )
+        return config.output.path
+
+
+def _inside(root: Path, value: str, name: str, where: str) -> Path:
+    root = root.resolve()
+    path = (root / value).resolve()
+    if not path.is_relative_to(root) or path == root:
+        raise ValueError(f"{name} must be a file path inside {where}, got {value!r}")
+    return path
+
+
+def _handler(service: RenderService) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def _send(self, status: int, payload: object) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_file(self, path: Path) -> None:
+            body = path.read_bytes()
+            content_type = {".png": "image/png", ".jpg": "image/jpeg", ".mp4": "video/mp4"}.get(
+                path.suffix.lower(), "application/octet-stream"
+            )
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+            if parts == ["health"]:
+                self._send(HTTPStatus.OK, service.health())
+            elif parts == ["jobs"]:
+                self._send(HTTPStatus.OK, [job.to_dict() for job in service.list()])
+            elif len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown job {parts[1]}"})
+                elif len(parts) == 2:
+                    self._send(HTTPStatus.OK, job.to_dict())
+                elif parts[2] != "output":
+                    self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+                elif job.status != "done":
+                    self._send(HTTPStatus.CONFLICT, {"error": f"Job {job.id} is {job.status}"})
+                else:
+                    try:
+                        path = service.output_path(job.outputs[0])
+                    except ValueError as exc:
+                        self._send(HTTPStatus.FORBIDDEN, {"error": str(exc)})
+                        return
+                    self._send_file(path)
+            else:
+                self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path.split("?", 1)[0].rstrip("/") != "/jobs":
+                self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = JobRequest.model_validate_json(self.rfile.read(length))
+                job = service.submit(request)
+            except ValidationError as exc:
+                self._send(HTTPStatus.BAD_REQUEST, {"error": "Invalid job", "details": json.loads(exc.json(include_url=False))})
+                return
+            except ValueError as exc:
+                self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+                return
+            if request.wait:
+                job.done.wait()
+                self._send(HTTPStatus.OK, job.to_dict())
+            else:
+                self._send(HTTPStatus.ACCEPTED, job.to_dict())
+
+    return Handler
+
+
+def create_server(service: RenderService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from geovideo.draw import draw_pin
+
+RING_STEPS = 40
+PIN_RADIUS = 12
+PIN_TIP = 20
+
+
+@dataclass(frozen=True)
+class Sprite:
+    image: Image.Image
+    anchor: Tuple[int, int]
+
+
+def ring_params(step: int, scale: float = 1.0) -> Tuple[int, int]:
+    phase = step / RING_STEPS
+    return max(int((24 + phase * 40) * scale), 1), int(200 * (1 - phase))
+
+
+def ring_step(phase: float) -> int:
+    return min(int(phase * RING_STEPS), RING_STEPS - 1)
+
+
+class SpriteAtlas:
+    def __init__(self, font: ImageFont.FreeTypeFont | ImageFont.ImageFont, scale: float = 1.0) -> None:
+        self.font = font
+        self.scale = scale
+        self._pins: Dict[Tuple[int, int, int], Sprite] = {}
+        self._rings: Dict[int, Sprite] = {}
+        self._badges: Dict[str, Sprite] = {}
+
+    def pin(self, color: Tuple[int, int, int]) -> Sprite:
+        sprite = self._pins.get(color)
+        if sprite is None:
+            anchor = (PIN_RADIUS + 1, PIN_RADIUS + 1)
+            image = Image.new("RGBA", (2 * PIN_RADIUS + 3, PIN_RADIUS + PIN_TIP + 3), (0, 0, 0, 0))
+            draw_pin(ImageDraw.Draw(image), anchor[0], anchor[1], color)
+            if self.scale != 1.0:
+                size = (max(round(image.width * self.scale), 1), max(round(image.height * self.scale), 1))
+                image = image.resize(size, Image.Resampling.LANCZOS)
+                anchor = (round(anchor[0] * self.scale), round(anchor[1] * self.scale))
+            sprite = self._pins[color] = Sprite(image=image, anchor=anchor)
+        return sprite
+
+    def ring(self, step: int) -> Sprite:
+        sprite = self._rings.get(step)
+        if sprite is None:
+            radius, alpha = ring_params(step, self.scale)
+            width = max(round(3 * self.scale), 1)
+            image = Image.new("RGBA", (radius * 2 + 2, radius * 2 + 2), (0, 0, 0, 0))
+            ImageDraw.Draw(image).ellipse((1, 1, radius * 2, radius * 2), outline=(255, 255, 255, alpha), width=width)
+            sprite = self._rings[step] = Sprite(image=image, anchor=(radius, radius))
+        return sprite
+
+    def badge(self, text: str, padding: int = 8) -> Sprite:
+        sprite = self._badges.get(text)
+        if sprite is None:
+            padding = round(padding * self.scale)
+            width, height = self.font.getbbox(text)[2:4]
+            image = Image.new("RGBA", (width + 2 * padding + 1, height + 2 * padding + 1), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(image)
+            radius = max(round(8 * self.scale), 1)
+            draw.rounded_rectangle(
+                (0, 0, width + 2 * padding, height + 2 * padding), radius=radius, fill=(0, 0, 0, 180)
+            )
+            draw.text((padding, padding), text, font=self.font, fill=(255, 255, 255))
+            sprite = self._badges[text] = Sprite(image=image, anchor=(padding, padding))
+        return sprite
+
+    def prepare_rings(self) -> None:
+        for step in range(RING_STEPS):
+            self.ring(step)
+
+
+def blit(base: Image.Image, sprite: Sprite, x: int, y: int) -> None:
+    left, top = x - sprite.anchor[0], y - sprite.anchor[1]
+    width, height = sprite.image.size
+    src_left, src_top = max(-left, 0), max(-top, 0)
+    src_right = min(width, base.width - left)
+    src_bottom = min(height, base.height - top)
+    if src_left >= src_right or src_top >= src_bottom:
+        return
+    base.alpha_composite(
+        sprite.image,
+        dest=(left + src_left, top + src_top),
+        source=(src_left, src_top, src_right, src_bottom),
+    )
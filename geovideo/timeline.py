@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 from geovideo.geo import lerp
 from geovideo.schemas import TimelineConfig
@@ -19,6 +21,7 @@ class TimelineState:
     active_index: int
     reveal_progress: float
     camera_zoom: float
+    ring_phase: float = 0.0
 
 
 def ease_in_out(t: float) -> float:
@@ -29,6 +32,14 @@ def ease_linear(t: float) -> float:
     return t
 
 
+def frame_count(duration: float, fps: int) -> int:
+    return max(int(round(duration * fps)), 1)
+
+
+def frame_times(duration: float, fps: int) -> List[float]:
+    return [idx / fps for idx in range(frame_count(duration, fps))]
+
+
 def build_poi_cues(count: int, cfg: TimelineConfig) -> List[PoiCue]:
     cues: List[PoiCue] = []
     for idx in range(count):
@@ -37,6 +48,10 @@ def build_poi_cues(count: int, cfg: TimelineConfig) -> List[PoiCue]:
     return cues
 
 
+def ring_phase(active_index: int, reveal_progress: float) -> float:
+    return (reveal_progress + active_index * 0.3) % 1.0
+
+
 def camera_zoom_at(t: float, cfg: TimelineConfig, default_zoom: float) -> float:
     start_zoom = cfg.camera_start_zoom or default_zoom
     end_zoom = cfg.camera_end_zoom or default_zoom
@@ -47,6 +62,12 @@ def camera_zoom_at(t: float, cfg: TimelineConfig, default_zoom: float) -> float:
     return lerp(start_zoom, end_zoom, ease(progress))
 
 
+def camera_zoom_range(cfg: TimelineConfig, default_zoom: float) -> Tuple[float, float]:
+    start = camera_zoom_at(0.0, cfg, default_zoom)
+    end = camera_zoom_at(cfg.duration, cfg, default_zoom)
+    return min(start, end), max(start, end)
+
+
 def timeline_state_at(t: float, count: int, cfg: TimelineConfig, default_zoom: float) -> TimelineState:
     cues = build_poi_cues(count, cfg)
     active = 0
@@ -56,4 +77,85 @@ def timeline_state_at(t: float, count: int, cfg: TimelineConfig, default_zoom: f
             active = cue.index
             reveal = min(max((t - cue.start) / max(cfg.poi_stagger, 0.001), 0.0), 1.0)
     zoom = camera_zoom_at(t, cfg, default_zoom)
-    return TimelineState(active_index=active, reveal_progress=reveal, camera_zoom=zoom)
+    return TimelineState(
+        active_index=active, reveal_progress=reveal, camera_zoom=zoom, ring_phase=ring_phase(active, reveal)
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledTimeline:
+    config: TimelineConfig
+    fps: int
+    default_zoom: float
+    cue_starts: np.ndarray
+    times: np.ndarray
+    active_index: np.ndarray
+    reveal_progress: np.ndarray
+    camera_zoom: np.ndarray
+    ring_phase: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def frame_index(self, t: float) -> int:
+        return min(max(int(round(t * self.fps)), 0), len(self.times) - 1)
+
+    def state(self, index: int) -> TimelineState:
+        return TimelineState(
+            active_index=int(self.active_index[index]),
+            reveal_progress=float(self.reveal_progress[index]),
+            camera_zoom=float(self.camera_zoom[index]),
+            ring_phase=float(self.ring_phase[index]),
+        )
+
+    def state_at(self, t: float) -> TimelineState:
+        index = self.frame_index(t)
+        if self.times[index] == t:
+            return self.state(index)
+        active, reveal = _cue_progress(np.asarray([t]), self.cue_starts, self.config.poi_stagger)
+        return TimelineState(
+            active_index=int(active[0]),
+            reveal_progress=float(reveal[0]),
+            camera_zoom=camera_zoom_at(t, self.config, self.default_zoom),
+            ring_phase=ring_phase(int(active[0]), float(reveal[0])),
+        )
+
+    def zoom_boundaries(self) -> List[Tuple[int, int]]:
+        zooms = np.rint(self.camera_zoom).astype(np.int64)
+        starts = np.flatnonzero(np.diff(zooms, prepend=zooms[0] - 1))
+        return [(int(index), int(zooms[index])) for index in starts]
+
+
+def _cue_progress(times: np.ndarray, starts: np.ndarray, stagger: float) -> Tuple[np.ndarray, np.ndarray]:
+    if not len(starts):
+        return np.zeros(len(times), dtype=np.int64), np.zeros(len(times))
+    active = np.searchsorted(starts, times, side="right") - 1
+    started = active >= 0
+    active = np.maximum(active, 0)
+    reveal = np.clip((times - starts[active]) / max(stagger, 0.001), 0.0, 1.0)
+    return active, np.where(started, reveal, 0.0)
+
+
+def compile_timeline(cfg: TimelineConfig, count: int, fps: int, default_zoom: float) -> CompiledTimeline:
+    times = np.arange(frame_count(cfg.duration, fps), dtype=np.float64) / fps
+    starts = np.asarray([cue.start for cue in build_poi_cues(count, cfg)], dtype=np.float64)
+    active, reveal = _cue_progress(times, starts, cfg.poi_stagger)
+    if cfg.duration <= 0:
+        zoom = np.full(len(times), float(default_zoom))
+    else:
+        start_zoom = cfg.camera_start_zoom or default_zoom
+        end_zoom = cfg.camera_end_zoom or default_zoom
+        progress = np.clip(times / cfg.duration, 0.0, 1.0)
+        eased = progress * progress * (3 - 2 * progress) if cfg.ease == "ease_in_out" else progress
+        zoom = start_zoom + (end_zoom - start_zoom) * eased
+    return CompiledTimeline(
+        config=cfg,
+        fps=fps,
+        default_zoom=default_zoom,
+        cue_starts=starts,
+        times=times,
+        active_index=active,
+        reveal_progress=reveal,
+        camera_zoom=zoom,
+        ring_phase=(reveal + active * 0.3) % 1.0,
+    )
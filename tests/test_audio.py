@@ -0,0 +1,46 @@
+from geovideo import audio
+from geovideo.audio import audio_cache_key, cached_mixed_audio
+from geovideo.schemas import AudioConfig
+
+
+def test_audio_cache_key_tracks_config_sources_and_duration(tmp_path):
+    music = tmp_path / "music.mp3"
+    music.write_bytes(b"music")
+    config = AudioConfig(music_path=str(music), cache_dir=str(tmp_path / "a"))
+    key = audio_cache_key(config, 10.0)
+
+    assert audio_cache_key(AudioConfig(), 10.0) is None
+    assert audio_cache_key(config.model_copy(update={"cache_dir": str(tmp_path / "b")}), 10.0) == key
+    assert audio_cache_key(config.model_copy(update={"music_volume": 0.8}), 10.0) != key
+    assert audio_cache_key(config, 12.0) != key
+    music.write_bytes(b"other music")
+    assert audio_cache_key(config, 10.0) != key
+
+
+def test_cached_mixed_audio_mixes_once(monkeypatch, tmp_path):
+    music = tmp_path / "music.mp3"
+    music.write_bytes(b"music")
+    config = AudioConfig(music_path=str(music), cache_dir=str(tmp_path / "cache"))
+    mixes = []
+
+    class Mixed:
+        duration = 2.0
+
+        def set_duration(self, duration):
+            self.duration = duration
+            return self
+
+        def write_audiofile(self, path, **kwargs):
+            mixes.append((kwargs["codec"], self.duration))
+            with open(path, "wb") as handle:
+                handle.write(b"aac")
+
+    monkeypatch.setattr(audio, "load_audio", lambda config, duration: None)
+    monkeypatch.setattr(audio, "mix_audio", lambda tracks, config: Mixed())
+    first = cached_mixed_audio(config, 5.0)
+    second = cached_mixed_audio(config, 5.0)
+
+    assert first == second
+    assert first.suffix == ".m4a" and first.read_bytes() == b"aac"
+    assert mixes == [("aac", 5.0)]
+    assert cached_mixed_audio(AudioConfig(), 5.0) is None
@@ -0,0 +1,43 @@
+from geovideo.basemap import build_mosaic, crop_view
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.geo import tile_range_for_view
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+
+class CountingProvider(TileProvider):
+    def __init__(self, cache_dir):
+        super().__init__(name="osm", url_template="", attribution="", cache_dir=cache_dir)
+        self.calls = 0
+
+    def get_tile(self, z, x, y):
+        self.calls += 1
+        return super().get_tile(z, x, y)
+
+
+def test_mosaic_crop_matches_view_size(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    provider = CountingProvider(tmp_path)
+    mosaic = build_mosaic(provider, 21.0285, 105.8048, 15, 300, 500)
+    start_x, start_y, end_x, end_y = tile_range_for_view(21.0285, 105.8048, 15, 300, 500)
+    assert provider.calls == (end_x - start_x + 1) * (end_y - start_y + 1)
+    assert crop_view(mosaic, 21.0285, 105.8048, 300, 500).size == (300, 500)
+
+
+def test_compositor_reuses_mosaic_per_zoom(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    config = InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "style": {"width": 300, "height": 500},
+            "timeline": {"duration": 4.0},
+        }
+    )
+    provider = CountingProvider(tmp_path)
+    compositor = Compositor(config, provider)
+    camera = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+    compositor.render_frame(FrameContext(time_s=0.0, camera=camera))
+    calls = provider.calls
+    compositor.render_frame(FrameContext(time_s=1.0, camera=camera))
+    assert provider.calls == calls
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from geovideo import batch
+from geovideo.batch import SharedProviders, discover_inputs, job_config, run_batch, write_manifest
+from geovideo.providers.cache import TileMemoryCache
+from geovideo.render import RenderStats
+from geovideo.schemas import ProviderConfig
+
+
+def test_shared_providers_reuse_instances(tmp_path):
+    shared = SharedProviders(TileMemoryCache(max_bytes=1024))
+    cache_dir = str(tmp_path / "tiles")
+    first = shared.get(ProviderConfig(name="osm", cache_dir=cache_dir))
+    assert shared.get(ProviderConfig(name="osm", cache_dir=cache_dir, memory_cache_bytes=1)) is first
+    assert shared.get(ProviderConfig(name="osm", cache_dir=str(tmp_path / "other"))) is not first
+    assert first.memory_cache is shared.memory_cache
+
+
+def test_run_batch_reports_each_job(monkeypatch, tmp_path):
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps({"center": {"name": "Center", "lat": 21.0, "lon": 105.8}}), encoding="utf-8")
+    (tmp_path / "bad.json").write_text(json.dumps({"center": {}}), encoding="utf-8")
+    providers = []
+
+    def fake_render(config, *, provider, **kwargs):
+        providers.append(provider)
+        return RenderStats(frames_rendered=3, frames_held=1)
+
+    monkeypatch.setattr(batch, "render_video", fake_render)
+    results = run_batch(discover_inputs(tmp_path), jobs=2, out_dir=tmp_path / "out")
+    assert [result.status for result in results] == ["failed", "ok"]
+    assert results[1].output == str(tmp_path / "out" / "good.mp4")
+    assert results[1].frames_rendered == 3
+    manifest = tmp_path / "manifest.json"
+    write_manifest(manifest, results)
+    assert json.loads(manifest.read_text(encoding="utf-8"))["failed"] == 1
+
+
+def test_batch_jobs_never_share_output_paths(monkeypatch, tmp_path):
+    center = {"name": "Center", "lat": 21.0, "lon": 105.8}
+    renditions = [{"path": "video_720.mp4", "width": 720}]
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.json").write_text(
+            json.dumps({"center": center, "output": {"renditions": renditions}}), encoding="utf-8"
+        )
+    paths = discover_inputs(tmp_path)
+    assert [job_config(path).output.path for path in paths] == [str(tmp_path / "a.mp4"), str(tmp_path / "b.mp4")]
+    rebased = [job_config(path, tmp_path / "out").output.renditions[0].path for path in paths]
+    assert rebased == [str(tmp_path / "out" / "a.video_720.mp4"), str(tmp_path / "out" / "b.video_720.mp4")]
+
+    renders = []
+    monkeypatch.setattr(batch, "render_video", lambda config, **kwargs: renders.append(config))
+    with pytest.raises(ValueError, match="both write"):
+        run_batch(paths, jobs=2)
+    assert renders == []
@@ -0,0 +1,29 @@
+from geovideo.benchmarks import QUICK_PLAN, compare_results, run_benchmarks
+
+
+def test_quick_benchmarks_produce_comparable_results():
+    results = run_benchmarks(QUICK_PLAN, video=False)
+
+    names = set(results["results"])
+    assert "render_frame.steady[180x320,pois=5]" in names
+    assert {"get_tile.cold_disk", "get_tile.warm_memory", "layout_labels[n=50]"} <= names
+    assert all(result["value"] >= 0 for result in results["results"].values())
+    assert not any(item.regression for item in compare_results(results, results))
+
+
+def test_compare_respects_direction_of_improvement():
+    baseline = {
+        "results": {
+            "frame": {"value": 10.0, "better": "lower"},
+            "fps": {"value": 30.0, "better": "higher"},
+        }
+    }
+    current = {
+        "results": {
+            "frame": {"value": 12.0, "better": "lower"},
+            "fps": {"value": 36.0, "better": "higher"},
+        }
+    }
+
+    regressions = {item.name: item.regression for item in compare_results(baseline, current, threshold=0.1)}
+    assert regressions == {"frame": True, "fps": False}
@@ -0,0 +1,60 @@
+import numpy as np
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext, FrameHold
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+CAMERA = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+
+
+def _compositor(tmp_path, **timeline) -> Compositor:
+    config = InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "pois": [
+                {"name": "School", "lat": 21.0309, "lon": 105.8072, "type": "school"},
+                {"name": "Market", "lat": 21.0267, "lon": 105.8003, "type": "market"},
+            ],
+            "style": {"width": 320, "height": 480, "fps": 10, "subtitle": "Subtitle"},
+            "timeline": {"duration": 4.0, **timeline},
+        }
+    )
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    return Compositor(config, provider)
+
+
+def test_static_layers_built_once_per_zoom(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    compositor = _compositor(tmp_path)
+    first = compositor.render_frame(FrameContext(time_s=0.5, camera=CAMERA))
+    layers = compositor._static_layers(CAMERA, CAMERA, 320, 480)
+    second = compositor.render_frame(FrameContext(time_s=1.5, camera=CAMERA))
+    assert compositor._static_layers(CAMERA, CAMERA, 320, 480) is layers
+    assert first.shape == second.shape == (480, 320, 3)
+    assert not np.array_equal(first, second)
+
+
+def test_frame_hold_reuses_identical_frames(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    compositor = _compositor(tmp_path, intro_delay=0.0, poi_stagger=0.5)
+    hold = FrameHold(compositor)
+    frames = [hold.render_rgb(FrameContext(time_s=t, camera=CAMERA)) for t in (2.0, 2.5, 3.0, 3.5)]
+    assert hold.rendered == 1
+    assert hold.held == 3
+    assert all(frame is frames[0] for frame in frames)
+
+
+def test_smooth_zoom_renders_from_deepest_mosaic(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    compositor = _compositor(tmp_path, camera_start_zoom=14, camera_end_zoom=16, smooth_zoom=True)
+    zooms = []
+    original = compositor.provider.get_tile
+    monkeypatch.setattr(compositor.provider, "get_tile", lambda z, x, y: zooms.append(z) or original(z, x, y))
+    keys = set()
+    for t in (0.0, 1.0, 2.0, 3.0):
+        ctx = FrameContext(time_s=t, camera=CAMERA)
+        assert compositor.render_frame(ctx).shape == (480, 320, 3)
+        keys.add(compositor.frame_key(ctx)[0].zoom)
+    assert set(zooms) == {16}
+    assert len(keys) == 4
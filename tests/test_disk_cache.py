@@ -0,0 +1,110 @@
+from geovideo.providers.disk_cache import ManagedTileStore, TileIndex, open_tile_store
+from geovideo.providers.store import DirectoryTileStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _store(tmp_path, **kwargs):
+    clock = Clock()
+    kwargs.setdefault("offline", lambda: False)
+    store = ManagedTileStore(
+        DirectoryTileStore(tmp_path / "osm"), TileIndex(tmp_path / "osm.index.sqlite"), clock=clock, **kwargs
+    )
+    return store, clock
+
+
+def test_put_over_budget_evicts_least_recently_used(tmp_path):
+    store, clock = _store(tmp_path, max_bytes=350)
+    for x in range(3):
+        clock.now += 1
+        store.put(12, x, 0, bytes(100))
+    clock.now += 1
+    assert store.get(12, 0, 0) is not None
+    clock.now += 1
+    store.put(12, 3, 0, bytes(100))
+
+    assert store.contains(12, 0, 0)
+    assert not store.contains(12, 1, 0)
+    assert store.contains(12, 2, 0)
+    assert store.contains(12, 3, 0)
+    store.close()
+
+
+def test_replacing_a_tile_counts_only_the_size_change(tmp_path):
+    store, _ = _store(tmp_path)
+    store.put(12, 0, 0, bytes(100))
+    store.put(12, 1, 0, bytes(100))
+    for _ in range(5):
+        store.put(12, 0, 0, bytes(100))
+    store.put(12, 1, 0, bytes(120))
+
+    assert store._bytes == store.index.total_bytes() == 220
+    store.close()
+
+
+def test_expired_tiles_read_as_misses_and_prune(tmp_path):
+    store, clock = _store(tmp_path, ttl_s=60)
+    store.put(10, 1, 1, b"old")
+    clock.now += 30
+    store.put(10, 2, 2, b"new")
+    clock.now += 45
+
+    assert store.get(10, 1, 1) is None
+    assert store.get(10, 2, 2) == b"new"
+    result = store.prune()
+    assert (result.expired, result.freed_bytes) == (1, 3)
+    assert list(store.iter_tiles()) == [(10, 2, 2)]
+    store.close()
+
+
+def test_expired_tiles_are_served_stale_when_offline(tmp_path):
+    store, clock = _store(tmp_path, ttl_s=60)
+    store.put(10, 1, 1, b"old")
+    clock.now += 120
+    assert store.get(10, 1, 1) is None
+
+    store.offline = lambda: True
+    assert store.get(10, 1, 1) == b"old"
+    assert store.contains(10, 1, 1)
+    store.close()
+
+
+def test_stats_report_hit_ratio_and_size_per_zoom(tmp_path):
+    store, _ = _store(tmp_path)
+    store.put(11, 0, 0, bytes(40))
+    store.put(13, 0, 0, bytes(10))
+    store.get(11, 0, 0)
+    store.get(11, 0, 0)
+    store.get(11, 5, 5)
+    store.close()
+
+    reopened = open_tile_store(tmp_path, "osm")
+    stats = {row.zoom: row for row in reopened.stats()}
+    assert (stats[11].tiles, stats[11].bytes, stats[11].hits, stats[11].misses) == (1, 40, 2, 1)
+    assert stats[11].hit_ratio == 2 / 3
+    assert stats[13].bytes == 10
+    reopened.close()
+
+
+def test_sync_indexes_tiles_written_before_metadata(tmp_path):
+    DirectoryTileStore(tmp_path / "osm").put(9, 4, 4, bytes(25))
+    store, _ = _store(tmp_path)
+
+    assert store.sync() == 1
+    assert store.prune(max_bytes=0).evicted == 1
+    assert not store.contains(9, 4, 4)
+    store.close()
+
+
+def test_index_is_created_on_first_use(tmp_path):
+    store = open_tile_store(tmp_path, "osm")
+    assert not (tmp_path / "osm.index.sqlite").exists()
+    store.put(9, 1, 1, bytes(5))
+    assert (tmp_path / "osm.index.sqlite").exists()
+    store.close()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from geovideo.basemap import overzoom_extent
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.draft import draft_config, draft_output_path
+from geovideo.prefetch import plan_views
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+CAMERA = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+
+
+def _config() -> InputConfig:
+    return InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "pois": [
+                {"name": "School", "lat": 21.0309, "lon": 105.8072, "type": "school"},
+                {"name": "Market", "lat": 21.0267, "lon": 105.8003, "type": "market"},
+            ],
+            "style": {"width": 540, "height": 960, "fps": 30, "subtitle": "Subtitle"},
+            "timeline": {"duration": 2.0, "camera_start_zoom": 15, "camera_end_zoom": 15},
+            "output": {
+                "path": "out/video.mp4",
+                "bitrate": "8M",
+                "renditions": [{"path": "out/small.mp4", "width": 270}],
+            },
+        }
+    )
+
+
+def test_draft_config_scales_size_fps_and_encoding():
+    draft = draft_config(_config(), 0.5)
+    assert (draft.style.width, draft.style.height, draft.style.fps) == (270, 480, 15)
+    assert draft.style.safe_margin_px == 40
+    assert not draft.style.show_rings
+    assert draft.output.preset == "ultrafast"
+    assert draft.output.bitrate is None
+    assert draft.output.renditions == []
+    assert draft_config(_config(), 0.33).style.width % 2 == 0
+    assert draft_output_path("out/video.mp4") == "out/video.draft.mp4"
+    with pytest.raises(ValueError):
+        draft_config(_config(), 1.5)
+
+
+def test_overzoom_extent_uses_floor_zoom_tiles():
+    assert overzoom_extent(14, 270, 480) == (14, 270, 480)
+    tile_zoom, width, height = overzoom_extent(14.5, 270, 480)
+    assert tile_zoom == 14
+    assert width < 270 and height < 480
+    assert plan_views(draft_config(_config(), 0.5), CAMERA, 0.5) == [(14, 270, 480)]
+
+
+def test_draft_frame_keeps_geometry_proportional(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    full = Compositor(_config(), provider)
+    draft = Compositor(draft_config(_config(), 0.5), provider, 0.5)
+    ctx = FrameContext(time_s=1.0, camera=CAMERA)
+
+    frame = draft.render_rgb(ctx)
+    full_camera, _ = full._frame_state(ctx)
+    draft_camera, _ = draft._frame_state(ctx)
+
+    assert frame.shape == (480, 270, 3)
+    assert draft_camera.zoom == full_camera.zoom - 1
+    np.testing.assert_allclose(draft._project(draft_camera).pois, full._project(full_camera).pois / 2, atol=1)
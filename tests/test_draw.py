@@ -0,0 +1,35 @@
+from geovideo.draw import _overlaps, layout_labels, load_font
+
+
+def test_layout_labels_never_overlap():
+    font = load_font(None, size=24)
+    labels = [(f"Label {idx}", (40 + (idx % 20) * 50, 60 + (idx // 20) * 45)) for idx in range(400)]
+    placements = layout_labels(labels, font)
+    assert placements
+    boxes = [placement.box for placement in placements]
+    for idx, box in enumerate(boxes):
+        assert not any(_overlaps(box, other) for other in boxes[idx + 1 :])
+
+
+def test_layout_labels_places_every_label_with_room():
+    font = load_font(None, size=24)
+    labels = [(f"Label {idx}", (60 + (idx % 5) * 200, 60 + (idx // 5) * 90)) for idx in range(100)]
+    placements = layout_labels(labels, font)
+    assert [placement.text for placement in placements] == [text for text, _ in labels]
+
+
+def test_layout_labels_tries_other_sides_before_shifting():
+    font = load_font(None, size=24)
+    placements = layout_labels([("First", (100, 100)), ("Second", (100, 100))], font)
+    first, second = placements
+    assert first.position[0] > 100
+    assert second.position[0] < 100
+    assert first.position[1] == second.position[1]
+
+
+def test_label_placement_moves_with_anchor():
+    font = load_font(None, size=24)
+    (placement,) = layout_labels([("Moved", (100, 100))], font)
+    moved = placement.moved_to((110, 95))
+    assert moved.position == (placement.position[0] + 10, placement.position[1] - 5)
+    assert moved.box[2] - moved.box[0] == placement.box[2] - placement.box[0]
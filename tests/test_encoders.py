@@ -0,0 +1,73 @@
+import re
+import subprocess
+
+import numpy as np
+import pytest
+
+from geovideo import encoders
+from geovideo.encoders import FfmpegPipeEncoder, ffmpeg_exe, fit_frame, rendition_size, x264_args
+from geovideo.schemas import InputConfig, OutputConfig, RenditionConfig
+
+
+def _duration(path):
+    probe = subprocess.run([ffmpeg_exe(), "-i", str(path)], stderr=subprocess.PIPE).stderr.decode()
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", probe).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_x264_args_follow_output_config():
+    args = x264_args(OutputConfig(crf=23, preset="fast", bitrate="4M", faststart=False))
+    assert args[args.index("-crf") + 1] == "23"
+    assert args[args.index("-preset") + 1] == "fast"
+    assert args[args.index("-b:v") + 1] == "4M"
+    assert "-movflags" not in args
+
+
+def test_pipe_encoder_writes_video(tmp_path):
+    try:
+        ffmpeg_exe()
+    except RuntimeError:
+        pytest.skip("ffmpeg not available")
+    path = tmp_path / "out.mp4"
+    with FfmpegPipeEncoder(path, 64, 48, 10, OutputConfig(preset="ultrafast")) as encoder:
+        for value in range(5):
+            encoder.write(np.full((48, 64, 3), value * 40, dtype=np.uint8))
+        with pytest.raises(ValueError):
+            encoder.write(np.zeros((10, 10, 3), dtype=np.uint8))
+    assert path.stat().st_size > 0
+
+
+def test_short_audio_does_not_cut_the_video(monkeypatch, tmp_path):
+    try:
+        ffmpeg_exe()
+    except RuntimeError:
+        pytest.skip("ffmpeg not available")
+    audio = tmp_path / "short.m4a"
+    subprocess.run(
+        [ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=duration=1", "-c:a", "aac", str(audio)],
+        check=True,
+    )
+    config = InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0, "lon": 105.8},
+            "style": {"width": 64, "height": 48, "fps": 10},
+            "timeline": {"duration": 4.0},
+            "output": {"path": str(tmp_path / "out.mp4"), "preset": "ultrafast"},
+        }
+    )
+    monkeypatch.setattr(encoders, "cached_mixed_audio", lambda config, duration: audio)
+    encoders.encode_with_ffmpeg_pipe(config, lambda t: np.full((48, 64, 3), int(t * 50), dtype=np.uint8))
+    assert _duration(config.output.path) == pytest.approx(config.timeline.duration, abs=0.1)
+
+
+def test_rendition_size_keeps_aspect_ratio():
+    assert rendition_size(RenditionConfig(path="a.mp4", width=720), 1080, 1920) == (720, 1280)
+    assert rendition_size(RenditionConfig(path="a.mp4", height=960), 1080, 1920) == (540, 960)
+    assert rendition_size(RenditionConfig(path="a.jpg", format="jpeg"), 1080, 1920) == (1080, 1920)
+
+
+def test_fit_frame_covers_target_size():
+    frame = np.zeros((192, 108, 3), dtype=np.uint8)
+    assert fit_frame(frame, 108, 192) is frame
+    assert fit_frame(frame, 72, 128).shape == (128, 72, 3)
+    assert fit_frame(frame, 100, 100).shape == (100, 100, 3)
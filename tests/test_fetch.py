@@ -0,0 +1,133 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from geovideo.prefetch import prefetch_tiles
+from geovideo.providers.base import TileProvider
+from geovideo.providers.fetch import FetchEngine, FetchError, TokenBucket
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (256, 256), (40, 120, 60)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TileServer:
+    def __init__(self, throttled=0, status=None):
+        self.throttled = throttled
+        self.status = status
+        self.paths = []
+        self.clients = set()
+        body = _png()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with lock:
+                    server.paths.append(self.path)
+                    server.clients.add(self.client_address)
+                    limited = server.throttled > 0
+                    server.throttled -= 1
+                if server.status or limited:
+                    self.send_response(server.status or 429)
+                    if limited:
+                        self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(TileServer(**kwargs))
+        return servers[-1]
+
+    yield start
+    for item in servers:
+        item.close()
+
+
+def _provider(tmp_path, url, **engine):
+    return TileProvider(
+        name="custom",
+        url_template=url + "/{z}/{x}/{y}.png",
+        attribution="",
+        cache_dir=tmp_path,
+        fetcher=FetchEngine(**engine),
+    )
+
+
+def test_token_bucket_allows_burst_then_paces_to_rate():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, burst=3, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        bucket.acquire()
+
+    assert slept == pytest.approx([0.1, 0.1])
+
+
+def test_prefetch_fetches_concurrently_over_reused_connections(tmp_path, server, monkeypatch):
+    monkeypatch.delenv("GEOVIDEO_OFFLINE", raising=False)
+    tiles = server()
+    provider = _provider(tmp_path, tiles.url, rate=0, workers=4)
+    keys = [(10, x, y) for x in range(6) for y in range(5)]
+
+    assert prefetch_tiles(provider, keys) == len(keys)
+    assert len(tiles.paths) == len(keys)
+    assert len(tiles.clients) <= 4
+    assert prefetch_tiles(provider, keys) == 0
+    assert provider.get_tile(10, 5, 4).size == (256, 256)
+
+
+def test_fetch_retries_after_rate_limit_response(tmp_path, server, monkeypatch):
+    monkeypatch.delenv("GEOVIDEO_OFFLINE", raising=False)
+    tiles = server(throttled=2)
+    slept = []
+    provider = _provider(tmp_path, tiles.url, rate=0, max_retries=3, sleep=slept.append)
+
+    assert provider.get_tile(3, 1, 2).size == (256, 256)
+    assert provider.fetcher.retries == 2
+    assert slept == [0.0, 0.0]
+
+
+def test_fetch_gives_up_after_max_retries(server):
+    tiles = server(status=503)
+    slept = []
+    engine = FetchEngine(rate=0, max_retries=3, sleep=slept.append)
+
+    with pytest.raises(FetchError):
+        engine.fetch(tiles.url + "/1/0/0.png")
+    assert len(tiles.paths) == 3
+    assert slept == [0.5, 1.0]
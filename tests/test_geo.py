@@ -1,4 +1,10 @@
-from geovideo.geo import bounds_for_points, choose_zoom_for_bounds, latlon_to_world_px
+from geovideo.geo import (
+    bounds_for_points,
+    choose_zoom_for_bounds,
+    latlon_to_screen_px,
+    latlon_to_screen_px_array,
+    latlon_to_world_px,
+)
 
 
 def test_latlon_to_world_px_origin():
@@ -11,3 +17,14 @@ def test_bounds_and_zoom():
     bounds = bounds_for_points([(0.0, 0.0), (10.0, 10.0)])
     zoom = choose_zoom_for_bounds(bounds, width=1080, height=1920, margin_ratio=0.1)
     assert zoom >= 1
+
+
+def test_array_projection_matches_scalar():
+    lats = [21.0309, 21.0267, -33.86]
+    lons = [105.8072, 105.8003, 151.21]
+    points = latlon_to_screen_px_array(lats, lons, 15.5, 21.0285, 105.8048, 1080, 1920)
+    assert points.shape == (3, 2)
+    for (x, y), lat, lon in zip(points, lats, lons):
+        expected = latlon_to_screen_px(lat, lon, 15.5, 21.0285, 105.8048, 1080, 1920)
+        assert abs(x - expected[0]) < 1e-6
+        assert abs(y - expected[1]) < 1e-6
@@ -0,0 +1,29 @@
+import numpy as np
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.parallel import ParallelFrameRenderer
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+
+def test_parallel_frames_match_sequential(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    config = InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "pois": [{"name": "School", "lat": 21.0309, "lon": 105.8072, "type": "school"}],
+            "style": {"width": 160, "height": 240, "fps": 5},
+            "timeline": {"duration": 2.0, "intro_delay": 0.0, "poi_stagger": 0.6},
+            "provider": {"cache_dir": str(tmp_path)},
+        }
+    )
+    camera = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    compositor = Compositor(config, provider)
+    with ParallelFrameRenderer(compositor, camera, workers=2, window=3) as renderer:
+        frames = [renderer.frame_at(idx / 5) for idx in range(10)]
+    expected = [compositor.render_rgb(FrameContext(time_s=idx / 5, camera=camera)) for idx in range(10)]
+    assert all(np.array_equal(a, b) for a, b in zip(frames, expected))
+    assert renderer.rendered + renderer.held == 10
+    assert renderer.held > 0
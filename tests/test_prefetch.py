@@ -0,0 +1,46 @@
+from geovideo.camera import CameraState
+from geovideo.geo import tile_range_for_view
+from geovideo.prefetch import plan_tiles, plan_zoom_levels, prefetch_tiles
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+
+def _config() -> InputConfig:
+    return InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "style": {"width": 540, "height": 960, "fps": 10},
+            "timeline": {"duration": 2.0, "camera_start_zoom": 14, "camera_end_zoom": 16},
+        }
+    )
+
+
+def test_plan_zoom_levels_follow_timeline():
+    camera = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+    assert plan_zoom_levels(_config(), camera) == [14, 15, 16]
+
+
+def test_plan_tiles_covers_each_view():
+    config = _config()
+    camera = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+    tiles = set(plan_tiles(config, camera))
+    start_x, start_y, end_x, end_y = tile_range_for_view(21.0285, 105.8048, 16, 540, 960)
+    assert (16, start_x, start_y) in tiles
+    assert (16, end_x, end_y) in tiles
+    assert len(tiles) == len(plan_tiles(config, camera))
+
+
+def test_prefetch_tiles_offline(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    calls = []
+    fetched = prefetch_tiles(provider, [(1, 0, 0), (1, 1, 0)], progress=lambda done, total: calls.append(done))
+    assert fetched == 0
+    assert calls == [1, 2]
+
+
+def test_plan_tiles_smooth_zoom_uses_deepest_level():
+    config = _config()
+    config.timeline.smooth_zoom = True
+    camera = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+    assert {z for z, _, _ in plan_tiles(config, camera)} == {16}
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from geovideo.preview import contact_sheet, frame_path, parse_interval, parse_times, preview_times
+
+
+def test_parse_interval_and_times():
+    assert parse_interval("0.5s") == 0.5
+    assert parse_interval("250ms") == 0.25
+    assert parse_interval("2") == 2.0
+    assert parse_times("0, 1.5,3") == [0.0, 1.5, 3.0]
+    with pytest.raises(ValueError):
+        parse_interval("-1s")
+
+
+def test_preview_times_sample_timeline_and_merge_explicit_times():
+    assert preview_times(2.0, every=0.5) == [0.0, 0.5, 1.0, 1.5]
+    assert preview_times(2.0, every=1.0, times=[0.25, 1.0, 9.0]) == [0.0, 0.25, 1.0, 2.0]
+
+
+def test_contact_sheet_grid_and_frame_paths(tmp_path):
+    frames = [(t, np.full((40, 20, 3), 60, dtype=np.uint8)) for t in (0.0, 0.5, 1.0)]
+    sheet = contact_sheet(frames, columns=2, thumb_width=20)
+
+    assert sheet.size == (2 * 28 + 8, 2 * 48 + 8)
+    assert frame_path(tmp_path / "frame.png", 1.5, 1) == tmp_path / "frame.png"
+    assert frame_path(tmp_path / "frame.png", 1.5, 3).name == "frame-0001.50s.png"
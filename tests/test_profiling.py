@@ -0,0 +1,46 @@
+import json
+
+from geovideo.camera import CameraState
+from geovideo.compositor import Compositor, FrameContext
+from geovideo.profiling import profiling, stage
+from geovideo.providers.base import TileProvider
+from geovideo.schemas import InputConfig
+
+CAMERA = CameraState(center_lat=21.0285, center_lon=105.8048, zoom=15)
+
+
+def test_stages_are_not_recorded_when_disabled():
+    with profiling(False) as profiler:
+        with stage("ignored"):
+            pass
+    assert profiler is None
+    assert stage("ignored") is stage("other")
+
+
+def test_render_frame_records_stages_and_writes_trace(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    config = InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "pois": [{"name": "School", "lat": 21.0309, "lon": 105.8072, "type": "school"}],
+            "style": {"width": 320, "height": 480},
+        }
+    )
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    compositor = Compositor(config, provider)
+    with profiling() as profiler:
+        for t in (0.5, 1.5):
+            compositor.render_frame(FrameContext(time_s=t, camera=CAMERA))
+
+    counts = {row.name: row.count for row in profiler.summary()}
+    assert counts["compositor.static_layers"] == 2
+    assert counts["basemap.render"] == 1
+    assert counts["compositor.color_convert"] == 2
+    assert counts["tile.get"] > 0
+    assert "compositor.composite" in profiler.format_summary()
+
+    profiler.write_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    event = trace["traceEvents"][0]
+    assert event["ph"] == "X" and event["dur"] >= 0
+    assert trace["otherData"]["summary"][0]["count"] >= 1
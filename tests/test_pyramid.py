@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from geovideo.basemap import build_mosaic
+from geovideo.geo import tile_range_for_view
+from geovideo.providers.base import TileProvider
+from geovideo.providers.pyramid import TilePyramid, build_pyramid
+from geovideo.providers.store import DirectoryTileStore
+
+
+def _png(color, size=256):
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class NoDecodeProvider(TileProvider):
+    def get_tile(self, z, x, y):
+        raise AssertionError(f"decoded tile {z}/{x}/{y}")
+
+
+def test_pyramid_holds_decoded_tiles(tmp_path):
+    store = DirectoryTileStore(tmp_path / "osm")
+    store.put(12, 1, 2, _png((10, 20, 30)))
+    store.put(12, 1, 3, _png((40, 50, 60), size=512))
+
+    assert build_pyramid(store, tmp_path / "osm.pyramid.npy") == 1
+    pyramid = TilePyramid(tmp_path / "osm.pyramid.npy")
+    assert (12, 1, 2) in pyramid
+    assert pyramid.tile_array(12, 1, 3) is None
+    assert isinstance(pyramid.tiles, np.memmap)
+    assert pyramid.tile_array(12, 1, 2)[100, 100].tolist() == [10, 20, 30]
+
+
+def test_mosaic_copies_pyramid_tiles_without_decoding(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    store = DirectoryTileStore(tmp_path / "osm")
+    start_x, start_y, end_x, end_y = tile_range_for_view(21.0285, 105.8048, 15, 300, 500)
+    for x in range(start_x, end_x + 1):
+        for y in range(start_y, end_y + 1):
+            store.put(15, x, y, _png((x % 256, y % 256, 7)))
+    build_pyramid(store, tmp_path / "osm.pyramid.npy")
+
+    plain = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path)
+    pyramid = TilePyramid(tmp_path / "osm.pyramid.npy")
+    mapped = NoDecodeProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path, pyramid=pyramid)
+
+    expected = build_mosaic(plain, 21.0285, 105.8048, 15, 300, 500)
+    actual = build_mosaic(mapped, 21.0285, 105.8048, 15, 300, 500)
+    assert np.array_equal(np.asarray(actual.image), np.asarray(expected.image))
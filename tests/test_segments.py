@@ -0,0 +1,110 @@
+import re
+import subprocess
+
+import numpy as np
+import pytest
+
+from geovideo import segments
+from geovideo.encoders import ffmpeg_exe
+from geovideo.schemas import InputConfig
+from geovideo.segments import (
+    SegmentManifest,
+    parse_segment,
+    plan_segments,
+    render_fingerprint,
+    render_segments,
+    segments_dir,
+)
+
+
+def _duration(path):
+    probe = subprocess.run([ffmpeg_exe(), "-i", str(path)], stderr=subprocess.PIPE).stderr.decode()
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", probe).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _config(tmp_path) -> InputConfig:
+    return InputConfig.model_validate(
+        {
+            "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+            "style": {"width": 64, "height": 48, "fps": 10},
+            "timeline": {"duration": 1.0},
+            "output": {"path": str(tmp_path / "video.mp4"), "preset": "ultrafast"},
+        }
+    )
+
+
+def test_parse_and_plan_segments():
+    assert parse_segment("2/8") == (1, 8)
+    for value in ("0/4", "5/4", "x/4", "3"):
+        with pytest.raises(ValueError):
+            parse_segment(value)
+    segments = plan_segments(10, 3)
+    assert [(segment.start, segment.end) for segment in segments] == [(0, 3), (3, 6), (6, 10)]
+    assert segments[0].name == "segment-0001-of-0003.mp4"
+    for frames, count in ((90, 16), (5, 4)):
+        uneven = plan_segments(frames, count)
+        assert uneven[0].start == 0 and uneven[-1].end == frames
+        assert all(segment.frames >= frames // count for segment in uneven)
+        assert all(prev.end == segment.start for prev, segment in zip(uneven, uneven[1:]))
+    with pytest.raises(ValueError):
+        plan_segments(2, 3)
+
+
+def test_manifest_ignores_stale_fingerprints_and_missing_files(tmp_path):
+    segments = plan_segments(10, 2)
+    path = tmp_path / segments[0].name
+    path.write_bytes(b"video")
+    manifest = SegmentManifest(tmp_path, "a", segments)
+    manifest.mark_done(segments[0], path, 1.0)
+
+    assert list(manifest.completed()) == [0]
+    assert SegmentManifest(tmp_path, "b", segments).completed() == {}
+    assert SegmentManifest(tmp_path, "a", plan_segments(12, 2)).completed() == {}
+    path.write_bytes(b"truncated video")
+    assert manifest.completed() == {}
+
+
+def test_render_segments_resumes_and_joins(tmp_path):
+    try:
+        ffmpeg_exe()
+    except RuntimeError:
+        pytest.skip("ffmpeg not available")
+    config = _config(tmp_path)
+    fingerprint = render_fingerprint(config, 3)
+    calls = []
+
+    def make_frame(t):
+        calls.append(t)
+        return np.full((48, 64, 3), int(t * 200), dtype=np.uint8)
+
+    first = render_segments(config, make_frame, 3, fingerprint, only=1)
+    assert first.rendered == [1] and not first.complete
+    assert len(calls) == 3
+
+    second = render_segments(config, make_frame, 3, fingerprint)
+    assert second.rendered == [0, 2]
+    assert second.skipped == [1]
+    assert second.complete
+    assert len(calls) == 10
+    assert (tmp_path / "video.mp4").stat().st_size > 0
+    assert len(list(segments_dir(config.output.path).glob("segment-*.mp4"))) == 3
+    assert render_fingerprint(config, 3) != render_fingerprint(config, 4)
+
+
+def test_joined_segments_keep_full_length_with_short_audio(monkeypatch, tmp_path):
+    try:
+        ffmpeg_exe()
+    except RuntimeError:
+        pytest.skip("ffmpeg not available")
+    audio = tmp_path / "short.m4a"
+    subprocess.run(
+        [ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=duration=0.3", "-c:a", "aac", str(audio)],
+        check=True,
+    )
+    monkeypatch.setattr(segments, "cached_mixed_audio", lambda config, duration: audio)
+    config = _config(tmp_path)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    result = render_segments(config, lambda t: frame, 2, render_fingerprint(config, 2))
+    assert result.complete
+    assert _duration(result.output) == pytest.approx(config.timeline.duration, abs=0.1)
@@ -0,0 +1,133 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from geovideo.server import JobRequest, RenderService, create_server
+
+CONFIG = {
+    "center": {"name": "Center", "lat": 21.0285, "lon": 105.8048},
+    "pois": [{"name": "School", "lat": 21.0309, "lon": 105.8072, "type": "school"}],
+    "style": {"width": 160, "height": 240, "fps": 10},
+    "timeline": {"duration": 1.0, "camera_start_zoom": 15, "camera_end_zoom": 15},
+}
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    config = dict(CONFIG)
+    service = RenderService(tmp_path / "out", jobs=1, cache_dir=tmp_path / "cache")
+    httpd = create_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", config, service
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def _request(url, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+
+
+def test_preview_jobs_reuse_warm_compositor(server):
+    url, config, service = server
+    for t in (0.2, 0.6):
+        status, body = _request(f"{url}/jobs", {"kind": "preview", "config": config, "times": [t], "wait": True})
+        job = json.loads(body)
+        assert status == 200
+        assert job["status"] == "done" and job["progress"] == 1.0
+    assert len(service._compositors) == 1
+
+    status, image = _request(f"{url}/jobs/{job['id']}/output")
+    assert status == 200 and image.startswith(b"\x89PNG")
+    status, body = _request(f"{url}/health")
+    assert json.loads(body)["compositors"] == 1
+
+
+def test_render_jobs_reuse_warm_compositor(server, monkeypatch):
+    url, config, service = server
+    used = []
+    monkeypatch.setattr(
+        "geovideo.server.render_video", lambda config, **kwargs: used.append((kwargs["compositor"], kwargs["camera"]))
+    )
+    _request(f"{url}/jobs", {"kind": "preview", "config": config, "wait": True})
+    for _ in range(2):
+        status, body = _request(f"{url}/jobs", {"kind": "render", "config": config, "wait": True})
+        assert status == 200 and json.loads(body)["status"] == "done"
+    (compositor, camera, _), = service._compositors.values()
+    assert used == [(compositor, camera)] * 2
+
+
+def test_invalid_and_unknown_jobs(server):
+    url, config, _ = server
+    status, body = _request(f"{url}/jobs", {"kind": "preview", "config": {"center": 1}})
+    assert status == 400 and json.loads(body)["error"] == "Invalid job"
+    status, _ = _request(f"{url}/jobs", {"kind": "preview", "config": config, "every": "fast"})
+    assert status == 400
+    assert _request(f"{url}/jobs/missing")[0] == 404
+
+
+def test_job_outputs_stay_inside_out_dir(server, tmp_path):
+    url, config, _ = server
+    for out in ("../escape.png", str(tmp_path / "escape.png"), "."):
+        status, body = _request(f"{url}/jobs", {"kind": "preview", "config": config, "out": out})
+        assert status == 400 and "output directory" in json.loads(body)["error"]
+    status, body = _request(f"{url}/jobs", {"kind": "preview", "config": config, "out": "a/b.png", "wait": True})
+    job = json.loads(body)
+    assert job["outputs"] == [str((tmp_path / "out" / "a" / "b.png").resolve())]
+    assert _request(f"{url}/jobs/{job['id']}/output")[1].startswith(b"\x89PNG")
+    assert not (tmp_path / "escape.png").exists()
+
+
+def test_job_config_paths_are_confined(server, tmp_path):
+    url, config, service = server
+    outside = str(tmp_path / "escape.jpg")
+    rejected = [
+        {"output": {"renditions": [{"path": outside, "format": "jpeg"}]}},
+        {"output": {"renditions": [{"path": "../escape.mp4", "width": 80}]}},
+        {"provider": {"cache_dir": str(tmp_path / "tiles")}},
+        {"audio": {"cache_dir": str(tmp_path / "audio")}},
+        {"style": {"font_path": "/etc/passwd"}},
+        {"audio": {"music_path": str(tmp_path / "music.mp3")}},
+    ]
+    for update in rejected:
+        status, body = _request(f"{url}/jobs", {"kind": "render", "config": dict(config, **update)})
+        assert status == 400 and json.loads(body)["error"] != "Invalid job", update
+    assert service.list() == []
+
+    job_config = dict(config, output={"renditions": [{"path": "posters/cover.jpg", "format": "jpeg"}]})
+    confined = service.confine(JobRequest.model_validate({"kind": "render", "config": job_config}).config)
+    assert confined.output.renditions[0].path == str((tmp_path / "out" / "posters" / "cover.jpg").resolve())
+    assert confined.provider.cache_dir == str(tmp_path / "cache" / "tiles")
+    assert confined.audio.cache_dir == str(tmp_path / "cache" / "audio")
+
+
+def test_input_files_resolve_inside_assets_dir(tmp_path):
+    service = RenderService(tmp_path / "out", jobs=1, assets_dir=tmp_path / "assets")
+    config = JobRequest.model_validate(
+        {"kind": "render", "config": dict(CONFIG, audio={"music_path": "beds/calm.mp3"})}
+    ).config
+    assert service.confine(config).audio.music_path == str((tmp_path / "assets" / "beds" / "calm.mp3").resolve())
+    with pytest.raises(ValueError):
+        service.confine(config.model_copy(update={"style": config.style.model_copy(update={"font_path": "../x.ttf"})}))
+    service.close()
+
+
+def test_failed_job_reports_error(monkeypatch, tmp_path):
+    service = RenderService(tmp_path, jobs=1)
+    monkeypatch.setattr(service, "_render", lambda job, request, progress: 1 / 0)
+    job = service.submit(JobRequest.model_validate({"kind": "render", "config": CONFIG}))
+    job.done.wait(5)
+    service.close()
+    assert job.status == "failed"
+    assert "ZeroDivisionError" in job.error
+    assert [item.id for item in service.list()] == [job.id]
@@ -0,0 +1,30 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from geovideo.draw import draw_pin, load_font
+from geovideo.sprites import RING_STEPS, SpriteAtlas, blit, ring_params, ring_step
+
+
+def test_pin_sprite_matches_vector_pin():
+    atlas = SpriteAtlas(load_font(None, size=24))
+    expected = Image.new("RGBA", (80, 80), (10, 20, 30, 255))
+    draw_pin(ImageDraw.Draw(expected), 40, 30, (255, 196, 0))
+    actual = Image.new("RGBA", (80, 80), (10, 20, 30, 255))
+    blit(actual, atlas.pin((255, 196, 0)), 40, 30)
+    assert np.array_equal(np.asarray(expected), np.asarray(actual))
+
+
+def test_blit_clips_at_frame_edges():
+    atlas = SpriteAtlas(load_font(None, size=24))
+    base = Image.new("RGBA", (20, 20), (0, 0, 0, 255))
+    blit(base, atlas.pin((255, 0, 0)), 0, 0)
+    blit(base, atlas.pin((255, 0, 0)), 500, 500)
+    assert base.getpixel((2, 2))[0] == 255
+
+
+def test_ring_steps_cover_phase_range():
+    assert ring_step(0.0) == 0
+    assert ring_step(0.999) == RING_STEPS - 1
+    assert ring_params(0) == (24, 200)
+    atlas = SpriteAtlas(load_font(None, size=24))
+    assert atlas.ring(3) is atlas.ring(3)
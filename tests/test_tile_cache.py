@@ -0,0 +1,31 @@
+from PIL import Image
+
+from geovideo.providers.base import TileProvider
+from geovideo.providers.cache import TileMemoryCache
+
+
+def _tile(value: int) -> Image.Image:
+    return Image.new("RGB", (256, 256), color=(value, value, value))
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = TileMemoryCache(max_bytes=2 * 256 * 256 * 3)
+    cache.put(("osm", 1, 0, 0), _tile(1))
+    cache.put(("osm", 1, 1, 0), _tile(2))
+    assert cache.get(("osm", 1, 0, 0)) is not None
+    cache.put(("osm", 1, 0, 1), _tile(3))
+    assert cache.get(("osm", 1, 1, 0)) is None
+    assert cache.get(("osm", 1, 0, 1)) is not None
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_provider_reuses_decoded_tiles(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEOVIDEO_OFFLINE", "1")
+    cache = TileMemoryCache(max_bytes=1024 * 1024)
+    provider = TileProvider(name="osm", url_template="", attribution="", cache_dir=tmp_path, memory_cache=cache)
+    first = provider.get_tile(3, 1, 2)
+    second = provider.get_tile(3, 1, 2)
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
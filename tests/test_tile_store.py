@@ -0,0 +1,65 @@
+import io
+
+from PIL import Image
+
+from geovideo.providers.base import TileProvider
+from geovideo.providers.store import DirectoryTileStore, MBTilesTileStore, copy_tiles
+
+
+def _png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_mbtiles_deduplicates_identical_tiles(tmp_path):
+    store = MBTilesTileStore(tmp_path / "tiles.mbtiles")
+    ocean = _png((20, 40, 200))
+    for x in range(4):
+        store.put(3, x, 1, ocean)
+    store.put(3, 0, 2, _png((0, 200, 0)))
+
+    assert store.unique_images() == 2
+    assert store.get(3, 2, 1) == ocean
+    assert store.get(3, 2, 5) is None
+    store.close()
+
+
+def test_mbtiles_stores_tms_rows_and_round_trips_xyz(tmp_path):
+    store = MBTilesTileStore(tmp_path / "tiles.mbtiles")
+    store.put(2, 1, 0, _png((1, 2, 3)))
+
+    row = store._conn.execute("SELECT tile_row FROM map").fetchone()[0]
+    assert row == 3
+    assert list(store.iter_tiles()) == [(2, 1, 0)]
+    assert store.contains(2, 1, 0)
+    store.close()
+
+
+def test_copy_tiles_between_directory_and_mbtiles(tmp_path):
+    directory = DirectoryTileStore(tmp_path / "dir")
+    directory.put(1, 0, 1, _png((9, 9, 9)))
+    directory.put(1, 1, 1, _png((8, 8, 8)))
+    archive = MBTilesTileStore(tmp_path / "tiles.mbtiles")
+
+    assert copy_tiles(directory, archive) == 2
+    exported = DirectoryTileStore(tmp_path / "out")
+    assert copy_tiles(archive, exported) == 2
+    assert exported.get(1, 1, 1) == directory.get(1, 1, 1)
+    archive.close()
+
+
+def test_provider_reads_tiles_from_store(tmp_path):
+    store = MBTilesTileStore(tmp_path / "tiles.mbtiles")
+    store.put(5, 3, 4, _png((10, 20, 30)))
+    provider = TileProvider(
+        name="osm",
+        url_template="http://invalid/{z}/{x}/{y}.png",
+        attribution="",
+        cache_dir=tmp_path,
+        store=store,
+    )
+
+    assert provider.get_tile(5, 3, 4).getpixel((0, 0)) == (10, 20, 30)
+    assert not provider.prefetch_tile(5, 3, 4)
+    store.close()
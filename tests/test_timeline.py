@@ -1,5 +1,5 @@
 from geovideo.schemas import TimelineConfig
-from geovideo.timeline import build_poi_cues, timeline_state_at
+from geovideo.timeline import build_poi_cues, compile_timeline, timeline_state_at
 
 
 def test_build_poi_cues():
@@ -15,3 +15,18 @@ def test_timeline_state():
     state = timeline_state_at(1.2, 2, cfg, default_zoom=12)
     assert state.active_index == 1
     assert 0.0 <= state.reveal_progress <= 1.0
+
+
+def test_compiled_timeline_matches_per_frame_evaluation():
+    cfg = TimelineConfig(duration=4.0, intro_delay=0.5, poi_stagger=0.7, camera_start_zoom=13, camera_end_zoom=16)
+    timeline = compile_timeline(cfg, 4, 10, 15)
+    assert len(timeline) == 40
+    for t in [*timeline.times.tolist(), 0.123, 2.71, -1.0, 9.0]:
+        assert timeline.state_at(t) == timeline_state_at(t, 4, cfg, 15)
+
+
+def test_compiled_timeline_zoom_boundaries():
+    cfg = TimelineConfig(duration=2.0, camera_start_zoom=14, camera_end_zoom=16, ease="linear")
+    timeline = compile_timeline(cfg, 0, 10, 15)
+    assert timeline.zoom_boundaries() == [(0, 14), (6, 15), (15, 16)]
+    assert timeline.state(5).active_index == 0